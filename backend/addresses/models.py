@@ -26,6 +26,13 @@ class Address(models.Model):
         verbose_name = "Address"
         verbose_name_plural = "Addresses"
         ordering = ["-is_default", "-created_at"]
+        indexes = [
+            # Address.save ka (user, is_default) filter + per-user list ordering
+            models.Index(
+                fields=["user", "-is_default", "-created_at"],
+                name="address_user_default_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.city}"
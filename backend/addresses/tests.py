@@ -1,3 +1,16 @@
 from django.test import TestCase
 
-# Create your tests here.
+from ecommerce.query_plans import QueryPlanAssertions
+from .models import Address
+
+
+class AddressQueryPlanTests(QueryPlanAssertions, TestCase):
+    def test_default_address_reset(self):
+        # Address.save() me chalne wali query
+        queryset = Address.objects.filter(user_id=1, is_default=True).exclude(pk=5)
+        self.assertUsesIndex(queryset, "address_user_default_idx")
+
+    def test_user_address_list(self):
+        self.assertUsesIndex(
+            Address.objects.filter(user_id=1), "address_user_default_idx"
+        )
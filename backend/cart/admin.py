@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Cart, CartItem
+from .models import Cart, CartItem, cart_total_aggregates
 
 
 class CartItemInline(admin.TabularInline):
@@ -12,6 +12,19 @@ class CartAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "total_items", "total_price", "created_at")
     inlines = [CartItemInline]
 
+    def get_queryset(self, request):
+        # changelist ke har row ke totals ek hi grouped query me
+        aggregates = cart_total_aggregates(prefix="items__")
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("user")
+            .annotate(
+                _total_items=aggregates["total_items"],
+                _total_price=aggregates["total_price"],
+            )
+        )
+
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
@@ -0,0 +1,54 @@
+"""
+Guest (anonymous) carts.
+
+A guest cart is a Cart row with user=None, identified by a signed token that
+the client sends back in the X-Cart-Token header. The token carries only the
+cart id; the signature (SECRET_KEY + salt) stops guessing other carts, and
+GUEST_CART_MAX_AGE makes old tokens - and their carts - expire. The row is
+created on the first write, never on a plain GET, so browsing doesn't add rows.
+"""
+from django.conf import settings
+from django.core import signing
+
+from .models import Cart
+
+SALT = "cart.guest"
+HEADER = "X-Cart-Token"
+
+
+def max_age():
+    return getattr(settings, "GUEST_CART_MAX_AGE", 30 * 24 * 3600)
+
+
+def make_token(cart):
+    return signing.dumps(cart.id, salt=SALT)
+
+
+def read_token(token):
+    """
+    Token -> guest cart id, or None if missing / tampered / expired.
+    """
+    if not token:
+        return None
+    try:
+        cart_id = signing.loads(token, salt=SALT, max_age=max_age())
+    except signing.BadSignature:  # SignatureExpired bhi isi me aata hai
+        return None
+    return cart_id if isinstance(cart_id, int) else None
+
+
+def request_token(request):
+    return request.headers.get(HEADER)
+
+
+def get_guest_cart(request, create=True):
+    """
+    Request ke token wala guest cart; token nahi / expired / cart merge ho
+    chuka ho to `create` pe naya cart (aur request._guest_token me naya token).
+    """
+    cart_id = read_token(request_token(request))
+    cart = Cart.objects.filter(id=cart_id, user=None).first() if cart_id else None
+    if cart is None and create:
+        cart = Cart.objects.create()
+        request._guest_token = make_token(cart)
+    return cart
@@ -0,0 +1,107 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from addresses.models import Address
+from cart.models import Cart, CartItem
+from cart.views import CheckoutView
+from orders.models import Order, OrderItem
+from products.models import Product
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_checkout(user, address, cart):
+    """
+    Purana checkout path (per-item OrderItem.objects.create -> update_total),
+    sirf comparison ke liye.
+    """
+    with transaction.atomic():
+        items = cart.items.select_related("product")
+        order = Order.objects.create(
+            user=user,
+            shipping_full_name=address.full_name,
+            shipping_phone=address.phone,
+            shipping_line1=address.line1,
+            shipping_city=address.city,
+            shipping_state=address.state,
+            shipping_pincode=address.pincode,
+        )
+        for item in items:
+            OrderItem.objects.create(
+                order=order, product=item.product, quantity=item.quantity, price=item.product.price
+            )
+        items.delete()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time checkout (latency + query count) for several cart sizes, legacy "
+        "per-item path vs the bulk path. Runs in a transaction that is rolled "
+        "back, so no data is left behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or min(options["sizes"]) < 1:
+            raise CommandError("--sizes and --repeat must be positive")
+        try:
+            with transaction.atomic():
+                self.run(options["sizes"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat):
+        user = User.objects.create_user("checkout-bench", password="unused-bench-pass")
+        address = Address.objects.create(
+            user=user, full_name="Bench", phone="0", line1="-", city="-", state="-", pincode="0"
+        )
+        cart = Cart.objects.create(user=user)
+        products = Product.objects.bulk_create(
+            [Product(title=f"Bench {i}", price=Decimal("99.00")) for i in range(max(sizes))]
+        )
+        view = CheckoutView.as_view()
+        factory = APIRequestFactory()
+
+        def fill(size):
+            CartItem.objects.bulk_create(
+                [CartItem(cart=cart, product=p, quantity=2) for p in products[:size]]
+            )
+
+        def bulk():
+            request = factory.post("/api/cart/checkout/", {"address_id": address.id})
+            force_authenticate(request, user)
+            response = view(request)
+            assert response.status_code == 201, response.data
+
+        def legacy():
+            legacy_checkout(user, address, cart)
+
+        self.stdout.write(f"{'items':>6} {'path':>7} {'ms':>9} {'queries':>8}")
+        for size in sizes:
+            for name, checkout in (("legacy", legacy), ("bulk", bulk)):
+                timings = []
+                for _ in range(repeat):
+                    fill(size)
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        checkout()
+                        timings.append(time.perf_counter() - started)
+                timings.sort()
+                median = timings[len(timings) // 2] * 1000
+                self.stdout.write(
+                    f"{size:>6} {name:>7} {median:>9.2f} {len(ctx.captured_queries):>8}"
+                )
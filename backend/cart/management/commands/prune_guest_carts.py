@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cart.sweep import expired_guest_carts, sweep
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete guest carts whose token has expired (older than "
+        "GUEST_CART_MAX_AGE), a bounded batch per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Carts deleted per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        started = time.monotonic()
+        # har batch apna chhota transaction - write lock der tak nahi
+        deleted = sweep(expired_guest_carts(), batch_size=batch_size, pause=0)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired guest carts in {time.monotonic() - started:.2f}s"
+            )
+        )
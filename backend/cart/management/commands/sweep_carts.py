@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cart.sweep import idle_rules, setting, sweep
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete idle carts (expired guest carts, empty carts older than "
+        "CART_EMPTY_MAX_AGE, any cart idle past CART_IDLE_MAX_AGE), a bounded "
+        "batch per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=setting("CART_SWEEP_BATCH_SIZE", 500),
+            help="Carts deleted per transaction (default: CART_SWEEP_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=setting("CART_SWEEP_PAUSE", 0.05),
+            help="Seconds to sleep between batches so checkouts get the write lock",
+        )
+
+    def handle(self, *args, **options):
+        batch_size, pause = options["batch_size"], options["pause"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        if pause < 0:
+            raise CommandError("--pause can't be negative")
+
+        started = time.monotonic()
+        total = 0
+        for label, queryset in idle_rules():
+            deleted = sweep(queryset, batch_size=batch_size, pause=pause)
+            total += deleted
+            self.stdout.write(f"{label}: {deleted}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {total} idle carts in {time.monotonic() - started:.2f}s")
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_activity(apps, schema_editor):
+    # purane carts: activity ka sabse accha andaza created_at
+    Cart = apps.get_model("cart", "Cart")
+    Cart.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_guest_cart_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last cart activity (view / change), at CART_ACTIVITY_RESOLUTION granularity'),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['updated_at'], name='cart_activity_idx'),
+        ),
+    ]
@@ -1,25 +1,169 @@
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, models, transaction
 from django.contrib.auth import get_user_model
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+from django.utils.functional import cached_property
 from products.models import Product
 
 User = get_user_model()
 
+def cart_total_aggregates(prefix=""):
+    """
+    Sum() expressions for item count and price, relative to CartItem (or to
+    Cart with prefix="items__").
+    """
+    return {
+        "total_items": Sum(f"{prefix}quantity"),
+        "total_price": Sum(
+            ExpressionWrapper(
+                F(f"{prefix}quantity") * F(f"{prefix}product__price"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        ),
+    }
+
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="carts", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last cart activity (view / change), at CART_ACTIVITY_RESOLUTION granularity",
+    )
+
+    class Meta:
+        indexes = [
+            # expired guest carts ki cleanup (token ki umar created_at se)
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(user__isnull=True),
+                name="cart_guest_created_idx",
+            ),
+            # idle carts ki batch cleanup (cart/sweep.py)
+            models.Index(fields=["updated_at"], name="cart_activity_idx"),
+        ]
 
     def __str__(self):
         if self.user:
             return f"Cart #{self.id} for {self.user.username}"
         return f"Cart #{self.id} (guest)"
 
+    def touch(self):
+        """
+        Activity mark karo - par har click pe UPDATE nahi: sirf tab jab pichla
+        mark CART_ACTIVITY_RESOLUTION se purana ho. Returns True if it wrote.
+        """
+        resolution = timedelta(seconds=getattr(settings, "CART_ACTIVITY_RESOLUTION", 3600))
+        now = timezone.now()
+        if self.updated_at and now - self.updated_at < resolution:
+            return False
+        Cart.objects.filter(pk=self.pk).update(updated_at=now)
+        self.updated_at = now
+        return True
+
+    @cached_property
+    def totals(self):
+        """
+        (total_items, total_price) - ek hi pass me.
+
+        Order of preference: admin ke annotate() wale values, phir prefetched
+        items (zero queries), warna ek aggregate() query.
+        """
+        if hasattr(self, "_total_items"):
+            return self._total_items or 0, self._total_price or Decimal("0")
+
+        if "items" in getattr(self, "_prefetched_objects_cache", {}):
+            total_items, total_price = 0, Decimal("0")
+            for item in self.items.all():
+                total_items += item.quantity
+                total_price += item.quantity * item.product.price
+            return total_items, total_price
+
+        totals = self.items.aggregate(**cart_total_aggregates())
+        return totals["total_items"] or 0, totals["total_price"] or Decimal("0")
+
+    def apply_operations(self, operations):
+        """
+        Applies a list of {"op": "add"|"set"|"remove", "product_id", "quantity"}
+        in order, inside one transaction, with at most one SELECT, one
+        bulk_create, one bulk_update and one DELETE.
+
+        Lines that only see "add" ops are incremented with F() so concurrent
+        adds are not lost; a "set"/"remove" makes the final quantity absolute.
+        Returns the set of product ids that don't exist (nothing is written
+        in that case).
+        """
+        # product_id -> ("delta" | "absolute", quantity)
+        final = {}
+        for operation in operations:
+            product_id = operation["product_id"]
+            mode, quantity = final.get(product_id, ("delta", 0))
+            if operation["op"] == "add":
+                final[product_id] = (mode, quantity + operation["quantity"])
+            elif operation["op"] == "set":
+                final[product_id] = ("absolute", operation["quantity"])
+            else:
+                final[product_id] = ("absolute", 0)
+
+        with transaction.atomic():
+            existing = {
+                item.product_id: item
+                for item in self.items.filter(product_id__in=final).only(
+                    "id", "cart", "product", "quantity"
+                )
+            }
+
+            to_create = {
+                product_id: quantity
+                for product_id, (_, quantity) in final.items()
+                if product_id not in existing and quantity > 0
+            }
+            if to_create:
+                known = set(
+                    Product.objects.filter(id__in=to_create).values_list("id", flat=True)
+                )
+                missing = set(to_create) - known
+                if missing:
+                    return missing
+
+            to_update, to_delete = [], []
+            for product_id, item in existing.items():
+                mode, quantity = final[product_id]
+                if mode == "absolute" and quantity <= 0:
+                    to_delete.append(item.id)
+                    continue
+                if mode == "delta":
+                    if quantity == 0:
+                        continue
+                    item.quantity = F("quantity") + quantity
+                else:
+                    item.quantity = quantity
+                to_update.append(item)
+
+            if to_create:
+                CartItem.objects.bulk_create(
+                    [
+                        CartItem(cart=self, product_id=product_id, quantity=quantity)
+                        for product_id, quantity in to_create.items()
+                    ]
+                )
+            if to_update:
+                CartItem.objects.bulk_update(to_update, ["quantity"])
+            if to_delete:
+                CartItem.objects.filter(id__in=to_delete).delete()
+        return set()
+
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.totals[0]
 
     @property
     def total_price(self):
-        return sum(item.quantity * item.product.price for item in self.items.all())
+        return self.totals[1]
 
 
 class CartItem(models.Model):
@@ -32,3 +176,42 @@ class CartItem(models.Model):
 
     def __str__(self):
         return f"{self.product.title} x {self.quantity}"
+
+    @classmethod
+    def add_quantity(cls, cart_id, product_id, quantity):
+        """
+        Atomic "add to cart": one INSERT .. ON CONFLICT(cart, product) DO UPDATE
+        that increments the existing row, so double taps / parallel tabs never
+        lose an update. The INSERT selects from the products table, so an
+        unknown product inserts nothing; returns False in that case.
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        products = connection.ops.quote_name(Product._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (cart_id, product_id, quantity) "
+                f"SELECT %s, id, %s FROM {products} WHERE id = %s "
+                "ON CONFLICT (cart_id, product_id) "
+                "DO UPDATE SET quantity = quantity + excluded.quantity",
+                [cart_id, quantity, product_id],
+            )
+            return cursor.rowcount > 0
+
+    @classmethod
+    def merge(cls, from_cart_id, into_cart_id):
+        """
+        Moves every line of one cart into another with a single
+        INSERT .. SELECT .. ON CONFLICT upsert: lines for the same product
+        add up, the rest are copied. The source lines are left in place
+        (delete the source cart afterwards). Returns the number of lines.
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (cart_id, product_id, quantity) "
+                f"SELECT %s, product_id, quantity FROM {table} WHERE cart_id = %s "
+                "ON CONFLICT (cart_id, product_id) "
+                "DO UPDATE SET quantity = quantity + excluded.quantity",
+                [into_cart_id, from_cart_id],
+            )
+            return cursor.rowcount
@@ -24,3 +24,23 @@ class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ["id", "items", "total_items", "total_price"]
+
+
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["add", "set", "remove"])
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        op = attrs["op"]
+        if op == "add":
+            attrs.setdefault("quantity", 1)
+            if attrs["quantity"] < 1:
+                raise serializers.ValidationError({"quantity": "add needs quantity >= 1"})
+        elif op == "set" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "set needs a quantity"})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
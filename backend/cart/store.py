@@ -0,0 +1,471 @@
+"""
+Cart storage engines behind CartView / CartBatchView / CheckoutView.
+
+settings.CART_STORE picks one:
+
+- "db" (default): every change goes straight to the Cart / CartItem tables.
+  Guest carts (cart/guest.py) always use this one.
+- "cache": the active cart lives in the Django cache (CART_STORE_CACHE_ALIAS)
+  and is written back to the tables in batches by a background flusher every
+  CART_STORE_FLUSH_INTERVAL seconds. Checkout flushes synchronously first.
+
+The cache engine needs a cache shared by every worker and never culled
+before a flush (the "carts" alias in settings; a per-process LocMemCache is
+refused). Writes to one user's cart are serialised by a lock in that cache,
+so any worker may serve any request. Each worker's flusher writes back the
+carts it changed; checkout and login flush the user's cached cart whichever
+worker changed it, and a dirty cart missing from the cache raises
+CartStateLost instead of checking out the stale DB copy.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.utils import timezone
+
+from products.models import Product
+from products.serializers import ProductSerializer, product_columns
+from promotions.engine import price_lines
+from .guest import get_guest_cart, read_token as read_guest_token
+from .models import Cart, CartItem
+from .sweep import ensure_sweeper
+from .serializers import CartItemSerializer, CartSerializer
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = 10  # seconds a cart lock may be held before it expires
+
+
+def get_or_create_cart(request, create=True):
+    """
+    Logged-in user ke liye: user-specific cart (ek request me ek hi query).
+    Guest ke liye: X-Cart-Token wala cart (cart/guest.py); `create=False` pe
+    token na ho to None.
+    """
+    cart = getattr(request, "_cart", None)
+    if cart is None:
+        if request.user.is_authenticated:
+            cart, _ = Cart.objects.get_or_create(user=request.user)
+        else:
+            cart = get_guest_cart(request, create=create)
+        if cart is not None:
+            cart.touch()  # activity (sweeper ke liye), throttled
+            ensure_sweeper()
+        request._cart = cart
+    return cart
+
+
+def merge_guest_cart(user, token):
+    """
+    Login pe guest cart ko user ke cart me merge karo: ek INSERT .. SELECT ..
+    ON CONFLICT upsert (CartItem.merge) + guest cart delete, cart size chahe
+    jitna ho. Returns the number of guest lines merged (0 if the token is
+    invalid / already used).
+    """
+    guest_id = read_guest_token(token)
+    if guest_id is None:
+        return 0
+    store = get_cart_store()
+    # cache store: user ke pending changes pehle DB me, warna merge unhe overwrite kar dega
+    try:
+        store.flush(user.id)
+    except CartStateLost:
+        pass  # logged; merge DB wale cart pe hi hota hai
+    with transaction.atomic():
+        if not Cart.objects.filter(id=guest_id, user=None).exists():
+            return 0
+        cart, _ = Cart.objects.get_or_create(user=user)
+        merged = CartItem.merge(guest_id, cart.id)
+        Cart.objects.filter(id=guest_id).delete()
+    store.forget(user.id)
+    return merged
+
+
+def serialize_cart(request, cart):
+    """
+    Cart items + unke products ek query me, products ke sirf wahi columns jo
+    response (?fields=...) aur total_price ko chahiye. Totals usi prefetched
+    list pe ek pass me bante hain (Cart.totals), koi extra query nahi.
+    """
+    columns = product_columns(ProductSerializer, request, extra=["price"])
+    # mutation ke baad purana prefetch / totals cache na reh jaye
+    getattr(cart, "_prefetched_objects_cache", {}).pop("items", None)
+    cart.__dict__.pop("totals", None)
+    prefetch_related_objects(
+        [cart],
+        Prefetch(
+            "items",
+            queryset=CartItem.objects.select_related("product")
+            .only("cart", "product", "quantity", *[f"product__{column}" for column in columns])
+            .order_by("id"),
+        ),
+    )
+    data = CartSerializer(cart, context={"request": request}).data
+    lines = [(item.product_id, item.quantity, item.product.price) for item in cart.items.all()]
+    return with_pricing(request, data, lines)
+
+
+def with_pricing(request, data, lines):
+    """
+    Promotions (?coupon=CODE bhi) ka discount aur payable total response me -
+    compiled rule set pe ek pass, koi query nahi (promotions/engine.py).
+    """
+    data.update(price_lines(lines, request.query_params.get("coupon")).as_dict())
+    return data
+
+
+class CartStateLost(Exception):
+    """
+    A cart marked dirty is no longer in the cache, so its unflushed changes
+    are gone; the DB copy is stale and must not be checked out silently.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        super().__init__(f"Unflushed cart changes for user {user_id} were lost from the cache")
+
+
+class DatabaseCartStore:
+    """
+    Har change seedha DB me (purana behaviour).
+    """
+
+    def render(self, request):
+        cart = get_or_create_cart(request, create=False)
+        if cart is None:
+            # guest jisne abhi kuch add nahi kiya - koi row nahi banani
+            data = {"id": None, "items": [], "total_items": 0, "total_price": 0.0}
+            return with_pricing(request, data, [])
+        return serialize_cart(request, cart)
+
+    def resolve_item(self, request, item_id):
+        cart = get_or_create_cart(request, create=False)
+        if cart is None:
+            return None
+        return (
+            CartItem.objects.filter(id=item_id, cart=cart)
+            .values_list("product_id", flat=True)
+            .first()
+        )
+
+    def apply(self, request, operations):
+        cart = get_or_create_cart(request)
+        if len(operations) == 1 and operations[0]["op"] == "add":
+            operation = operations[0]
+            if CartItem.add_quantity(cart.id, operation["product_id"], operation["quantity"]):
+                return set()
+            return {operation["product_id"]}
+        return cart.apply_operations(operations)
+
+    def flush(self, user_id=None):
+        return 0
+
+    def forget(self, user_id):
+        pass
+
+
+class CachedCartStore:
+    """
+    Active cart cache me: {"cart_id": id, "version": n,
+    "lines": {product_id: [quantity, item_id or None]}}.
+    """
+
+    key_prefix = "cart-store"
+
+    def __init__(self):
+        alias = getattr(settings, "CART_STORE_CACHE_ALIAS", "carts")
+        if isinstance(caches[alias], LocMemCache):
+            raise ImproperlyConfigured(
+                f"CART_STORE_CACHE_ALIAS {alias!r} is a per-process LocMemCache; the "
+                "cache cart store needs a cache shared by every worker that is "
+                "never culled before a flush (see the 'carts' alias in settings)."
+            )
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._user_locks = [threading.Lock() for _ in range(64)]
+        self._flusher = None
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "CART_STORE_CACHE_ALIAS", "carts")]
+
+    def key(self, user_id):
+        return f"{self.key_prefix}:{user_id}"
+
+    @contextmanager
+    def lock(self, user_id):
+        # process ke andar threading lock, workers ke beech cache.add() lock
+        with self._user_locks[user_id % len(self._user_locks)]:
+            key = f"{self.key(user_id)}:lock"
+            # lock apne aap LOCK_TIMEOUT me expire hota hai (crashed holder)
+            while not self.cache.add(key, 1, timeout=LOCK_TIMEOUT):
+                time.sleep(0.01)
+            try:
+                yield
+            finally:
+                self.cache.delete(key)
+
+    # --- reads -----------------------------------------------------------
+
+    def load(self, user_id):
+        state = self.cache.get(self.key(user_id))
+        if state is None:
+            with self.lock(user_id):
+                state = self._load_locked(user_id)
+        return state
+
+    def _load_locked(self, user_id):
+        # caller ke paas lock hai - dobara lock() mat lo (non-reentrant)
+        state = self.cache.get(self.key(user_id))
+        if state is None:
+            cart, _ = Cart.objects.get_or_create(user_id=user_id)
+            state = {
+                "cart_id": cart.id,
+                "version": 0,
+                "lines": {
+                    product_id: [quantity, item_id]
+                    for item_id, product_id, quantity in cart.items.values_list(
+                        "id", "product_id", "quantity"
+                    )
+                },
+            }
+            self.cache.set(self.key(user_id), state, timeout=None)
+        return state
+
+    def render(self, request):
+        state = self.load(request.user.id)
+        columns = product_columns(ProductSerializer, request, extra=["price"])
+        products = Product.objects.only(*columns).in_bulk(list(state["lines"]))
+
+        items, total_items, total_price = [], 0, 0
+        for product_id, (quantity, item_id) in state["lines"].items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            items.append(
+                CartItem(id=item_id, cart_id=state["cart_id"], product=product, quantity=quantity)
+            )
+            total_items += quantity
+            total_price += quantity * product.price
+
+        data = {
+            "id": state["cart_id"],
+            "items": CartItemSerializer(items, many=True, context={"request": request}).data,
+            "total_items": total_items,
+            "total_price": float(total_price),
+        }
+        lines = [(item.product_id, item.quantity, item.product.price) for item in items]
+        return with_pricing(request, data, lines)
+
+    def resolve_item(self, request, item_id):
+        for product_id, (_, line_item_id) in self.load(request.user.id)["lines"].items():
+            if line_item_id == item_id:
+                return product_id
+        return None
+
+    # --- writes ----------------------------------------------------------
+
+    def apply(self, request, operations):
+        user_id = request.user.id
+        with self.lock(user_id):
+            state = self._load_locked(user_id)
+            lines = {product_id: list(line) for product_id, line in state["lines"].items()}
+
+            new_ids = {
+                operation["product_id"]
+                for operation in operations
+                if operation["op"] != "remove" and operation["product_id"] not in lines
+            }
+            if new_ids:
+                missing = new_ids - set(
+                    Product.objects.filter(id__in=new_ids).values_list("id", flat=True)
+                )
+                if missing:
+                    return missing
+
+            for operation in operations:
+                product_id = operation["product_id"]
+                quantity, item_id = lines.get(product_id, [0, None])
+                if operation["op"] == "add":
+                    quantity += operation["quantity"]
+                elif operation["op"] == "set":
+                    quantity = operation["quantity"]
+                else:
+                    quantity = 0
+                if quantity > 0:
+                    lines[product_id] = [quantity, item_id]
+                else:
+                    lines.pop(product_id, None)
+
+            state = {**state, "lines": lines, "version": state["version"] + 1}
+            self.cache.set(self.key(user_id), state, timeout=None)
+        self.mark_dirty(user_id)
+        return set()
+
+    def mark_dirty(self, user_id):
+        with self._dirty_lock:
+            self._dirty.add(user_id)
+        self.ensure_flusher()
+
+    def forget(self, user_id):
+        with self.lock(user_id):
+            self.cache.delete(self.key(user_id))
+        with self._dirty_lock:
+            self._dirty.discard(user_id)
+
+    # --- write-behind ----------------------------------------------------
+
+    def flush(self, user_id=None):
+        """
+        Writes dirty carts (or just `user_id`'s) back in ONE transaction:
+        one DELETE for lines that were removed, one bulk upsert for the rest.
+        Returns the number of carts flushed.
+        """
+        with self._dirty_lock:
+            if user_id is None:
+                user_ids = set(self._dirty)
+            else:
+                # checkout / merge: cached state padho chahe cart kisi aur worker
+                # ne badla ho (local dirty set me na ho)
+                user_ids = {user_id}
+            was_dirty = user_ids & self._dirty
+            self._dirty -= user_ids
+        if not user_ids:
+            return 0
+
+        keys = {self.key(uid): uid for uid in user_ids}
+        states = {keys[key]: state for key, state in self.cache.get_many(keys).items()}
+        lost = was_dirty - set(states)
+        if lost:
+            # unflushed changes cache se gayab (evicted / cache restart)
+            logger.error("Cart store lost unflushed carts for users %s", sorted(lost))
+            if user_id in lost:
+                raise CartStateLost(user_id)
+        if not states:
+            return 0
+        live_carts = set(
+            Cart.objects.filter(
+                id__in=[state["cart_id"] for state in states.values()]
+            ).values_list("id", flat=True)
+        )
+        for uid, state in states.items():
+            if state["cart_id"] not in live_carts:
+                states[uid] = self._reattach(uid, state)
+        all_product_ids = {pid for state in states.values() for pid in state["lines"]}
+        live_products = set(
+            Product.objects.filter(id__in=all_product_ids).values_list("id", flat=True)
+        )
+
+        rows, stale = [], Q()
+        for state in states.values():
+            keep = [pid for pid in state["lines"] if pid in live_products]
+            rows += [
+                CartItem(cart_id=state["cart_id"], product_id=pid, quantity=state["lines"][pid][0])
+                for pid in keep
+            ]
+            stale_lines = Q(cart_id=state["cart_id"])
+            if keep:
+                stale_lines &= ~Q(product_id__in=keep)
+            stale |= stale_lines
+
+        try:
+            with transaction.atomic():
+                if stale:
+                    CartItem.objects.filter(stale).delete()
+                # flushed carts = active carts (sweeper inhe idle na samjhe)
+                Cart.objects.filter(id__in=[state["cart_id"] for state in states.values()]).update(
+                    updated_at=timezone.now()
+                )
+                saved = CartItem.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["cart", "product"],
+                    update_fields=["quantity"],
+                )
+        except Exception:
+            with self._dirty_lock:
+                self._dirty |= user_ids
+            raise
+
+        self._remember_item_ids(states, saved)
+        return len(states)
+
+    def _reattach(self, user_id, state):
+        # cache wala cart sweep ho chuka (kisi aur process ne) - lines naye cart pe
+        with self.lock(user_id):
+            cart, _ = Cart.objects.get_or_create(user_id=user_id)
+            state = self.cache.get(self.key(user_id)) or state
+            state = {
+                **state,
+                "cart_id": cart.id,
+                "lines": {pid: [line[0], None] for pid, line in state["lines"].items()},
+            }
+            self.cache.set(self.key(user_id), state, timeout=None)
+        return state
+
+    def _remember_item_ids(self, states, saved):
+        # naye lines ko DB ids de do, taaki PATCH/DELETE item_id se chal sake
+        ids = {(item.cart_id, item.product_id): item.pk for item in saved if item.pk}
+        for uid, flushed in states.items():
+            with self.lock(uid):
+                state = self.cache.get(self.key(uid))
+                if state is None or state["cart_id"] != flushed["cart_id"]:
+                    continue
+                changed = False
+                for pid, line in state["lines"].items():
+                    item_id = ids.get((state["cart_id"], pid))
+                    if line[1] is None and item_id is not None:
+                        line[1] = item_id
+                        changed = True
+                if changed:
+                    self.cache.set(self.key(uid), state, timeout=None)
+
+    def ensure_flusher(self):
+        interval = getattr(settings, "CART_STORE_FLUSH_INTERVAL", 5)
+        if not interval or (self._flusher and self._flusher.is_alive()):
+            return
+        with self._dirty_lock:
+            if self._flusher and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_forever, args=(interval,), name="cart-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Cart write-behind flush failed; will retry")
+            finally:
+                connection.close()
+
+
+_stores = {}
+
+
+def get_cart_store(request=None):
+    """
+    settings.CART_STORE wala store. Guest carts hamesha DB me rehte hain
+    (token kisi bhi process pe chal sake), isliye anonymous request -> "db".
+    """
+    name = getattr(settings, "CART_STORE", "db")
+    if request is not None and not request.user.is_authenticated:
+        name = "db"
+    if name not in _stores:
+        if name == "cache":
+            _stores[name] = CachedCartStore()
+        elif name == "db":
+            _stores[name] = DatabaseCartStore()
+        else:
+            raise ValueError(f"Unknown CART_STORE {name!r}; use 'db' or 'cache'")
+    return _stores[name]
@@ -0,0 +1,135 @@
+"""
+Idle cart cleanup (`manage.py sweep_carts`, or in-process every
+CART_SWEEP_INTERVAL seconds).
+
+Cart.updated_at is the last activity: it is bumped by any cart change and, at
+most once per CART_ACTIVITY_RESOLUTION, by just opening the cart. A cart is
+swept when it is
+
+- a guest cart whose token has expired (created_at older than GUEST_CART_MAX_AGE)
+- an empty cart idle longer than CART_EMPTY_MAX_AGE
+- any cart idle longer than CART_IDLE_MAX_AGE
+
+Each rule is its own index range scan (cart_guest_created_idx /
+cart_activity_idx). Deletes run in small transactions of CART_SWEEP_BATCH_SIZE
+carts with a CART_SWEEP_PAUSE sleep in between, so the SQLite write lock is
+never held long enough to stall a checkout. The idle condition is re-applied
+inside each batch's DELETE, so a cart touched meanwhile survives.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .guest import max_age as guest_max_age
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def expired_guest_carts(now=None):
+    now = now or timezone.now()
+    return Cart.objects.filter(user=None, created_at__lt=now - timedelta(seconds=guest_max_age()))
+
+
+def idle_rules(now=None):
+    """
+    [(label, queryset), ...] - sweep order: guests, empty, idle.
+    """
+    now = now or timezone.now()
+    empty_age = timedelta(seconds=setting("CART_EMPTY_MAX_AGE", 24 * 3600))
+    idle_age = timedelta(seconds=setting("CART_IDLE_MAX_AGE", 90 * 24 * 3600))
+    return [
+        ("expired guest", expired_guest_carts(now)),
+        (
+            "empty",
+            Cart.objects.filter(updated_at__lt=now - empty_age).filter(
+                ~Exists(CartItem.objects.filter(cart=OuterRef("pk")))
+            ),
+        ),
+        ("idle", Cart.objects.filter(updated_at__lt=now - idle_age)),
+    ]
+
+
+def sweep(queryset, batch_size=None, pause=None, max_batches=None):
+    """
+    `queryset` ke carts (aur cascade se unke items) batch me delete.
+    Returns the number of carts deleted.
+    """
+    from .store import get_cart_store
+
+    batch_size = batch_size or setting("CART_SWEEP_BATCH_SIZE", 500)
+    pause = setting("CART_SWEEP_PAUSE", 0.05) if pause is None else pause
+    store = get_cart_store()
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            rows = list(queryset.values_list("id", "user_id")[:batch_size])
+            if not rows:
+                break
+            # condition dobara lagao: beech me touch hua cart bach jaye
+            _, per_model = queryset.filter(id__in=[cart_id for cart_id, _ in rows]).delete()
+        deleted += per_model.get(Cart._meta.label, 0)
+        batches += 1
+        for _, user_id in rows:
+            if user_id is not None:
+                store.forget(user_id)
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def sweep_idle_carts(batch_size=None, pause=None, now=None):
+    """
+    Saare rules chalao. Returns {label: carts deleted}.
+    """
+    return {
+        label: sweep(queryset, batch_size=batch_size, pause=pause)
+        for label, queryset in idle_rules(now)
+    }
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def ensure_sweeper():
+    """
+    CART_SWEEP_INTERVAL > 0 ho to process me ek daemon sweeper thread
+    (cron ke bina chhote deployments ke liye). 0 = sirf management command.
+    """
+    global _sweeper
+    interval = setting("CART_SWEEP_INTERVAL", 0)
+    if not interval or (_sweeper and _sweeper.is_alive()):
+        return
+    with _sweeper_lock:
+        if _sweeper and _sweeper.is_alive():
+            return
+        _sweeper = threading.Thread(
+            target=_sweep_forever, args=(interval,), name="cart-sweeper", daemon=True
+        )
+        _sweeper.start()
+
+
+def _sweep_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            swept = sweep_idle_carts()
+            if any(swept.values()):
+                logger.info("Swept idle carts: %s", swept)
+        except Exception:
+            logger.exception("Idle cart sweep failed; will retry")
+        finally:
+            connection.close()
@@ -1,3 +1,536 @@
-from django.test import TestCase
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+import io
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from addresses.models import Address
+from orders.models import Order
+from products.models import Product
+from . import store, sweep
+from .guest import make_token as guest_token
+from .models import Cart, CartItem
+
+User = get_user_model()
+
+
+class CartTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+
+    def make_product(self, title="Item", price="100.00"):
+        return Product.objects.create(title=title, price=Decimal(price))
+
+    def add_items(self, count, quantity=2):
+        products = [self.make_product(f"Item {i}", str(10 + i)) for i in range(count)]
+        CartItem.objects.bulk_create(
+            [CartItem(cart=self.cart, product=p, quantity=quantity) for p in products]
+        )
+        return products
+
+
+class CartFieldsTests(CartTestMixin, APITestCase):
+    def test_fields_param_narrows_nested_products(self):
+        [product] = self.add_items(1, quantity=3)
+        response = self.client.get(reverse("cart"), {"fields": "title"})
+
+        item = response.data["items"][0]
+        self.assertEqual(item["product"], {"id": product.id, "title": product.title})
+        self.assertEqual(item["quantity"], 3)
+        self.assertEqual(response.data["total_items"], 3)
+
+
+class CartRenderingTests(CartTestMixin, APITestCase):
+    def get_cart(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("cart"))
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(ctx.captured_queries)
+
+    def test_totals(self):
+        self.add_items(3, quantity=2)  # prices 10, 11, 12
+        data, _ = self.get_cart()
+        self.assertEqual(data["total_items"], 6)
+        self.assertEqual(data["total_price"], 66.0)
+        self.assertEqual(len(data["items"]), 3)
+
+    def test_query_count_is_constant(self):
+        self.add_items(1)
+        self.get_cart()  # warm-up: promotions rule set compile (process me ek baar)
+        _, small = self.get_cart()
+        self.add_items(30)
+        _, large = self.get_cart()
+
+        # cart get_or_create + items/products prefetch + wishlist ids
+        self.assertEqual(small, 3)
+        self.assertEqual(large, 3)
+
+    def test_totals_without_prefetch_use_one_aggregate(self):
+        self.add_items(2, quantity=1)
+        cart = Cart.objects.get(pk=self.cart.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual((cart.total_items, cart.total_price), (2, Decimal("21.00")))
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+class AddToCartTests(CartTestMixin, APITestCase):
+    def test_add_increments_existing_line(self):
+        product = self.make_product()
+        self.client.post(reverse("cart"), {"product_id": product.id, "quantity": 2})
+        response = self.client.post(reverse("cart"), {"product_id": product.id, "quantity": 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CartItem.objects.get(cart=self.cart, product=product).quantity, 5)
+
+    def test_unknown_product_is_404(self):
+        response = self.client.post(reverse("cart"), {"product_id": 999999})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_invalid_quantity_is_400(self):
+        product = self.make_product()
+        for quantity in ("abc", 0, -2):
+            response = self.client.post(
+                reverse("cart"), {"product_id": product.id, "quantity": quantity}
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class CartBatchTests(CartTestMixin, APITestCase):
+    url = reverse("cart-batch")
+
+    def post_ops(self, *operations):
+        return self.client.post(self.url, {"operations": list(operations)}, format="json")
+
+    def quantities(self):
+        return dict(
+            CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity")
+        )
+
+    def test_mixed_operations_apply_in_order(self):
+        keep, change, drop = self.add_items(3, quantity=2)
+        new = self.make_product("New")
+
+        response = self.post_ops(
+            {"op": "add", "product_id": keep.id, "quantity": 3},
+            {"op": "set", "product_id": change.id, "quantity": 7},
+            {"op": "remove", "product_id": drop.id},
+            {"op": "add", "product_id": new.id},
+            {"op": "add", "product_id": new.id, "quantity": 2},
+            {"op": "set", "product_id": change.id, "quantity": 1},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {keep.id: 5, change.id: 1, new.id: 3})
+        self.assertEqual(response.data["total_items"], 9)
+
+    def test_write_queries_do_not_grow_with_operations(self):
+        products = self.add_items(20, quantity=1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.post_ops(*[{"op": "set", "product_id": p.id, "quantity": 4} for p in products])
+        # auth nahi (force_authenticate): cart, SELECT items, bulk UPDATE,
+        # savepoint/commit, render (items + wishlist)
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+        self.assertEqual(set(self.quantities().values()), {4})
+
+    def test_unknown_product_rejects_whole_batch(self):
+        [product] = self.add_items(1, quantity=1)
+        response = self.post_ops(
+            {"op": "set", "product_id": product.id, "quantity": 5},
+            {"op": "add", "product_id": 999999},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product_ids"], [999999])
+        self.assertEqual(self.quantities(), {product.id: 1})
+
+    def test_validation(self):
+        self.assertEqual(self.post_ops().status_code, 400)
+        self.assertEqual(self.post_ops({"op": "set", "product_id": 1}).status_code, 400)
+        self.assertEqual(self.post_ops({"op": "explode", "product_id": 1}).status_code, 400)
+
+
+class CheckoutTests(CartTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.address = Address.objects.create(
+            user=self.user, full_name="Buyer", phone="9999999999", line1="Street 1",
+            city="Jaipur", state="RJ", pincode="302001",
+        )
+
+    def checkout(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("cart-checkout"), {"address_id": self.address.id})
+        self.assertEqual(response.status_code, 201)
+        return Order.objects.get(pk=response.data["order_id"]), len(ctx.captured_queries)
+
+    def test_order_items_and_total(self):
+        self.add_items(3, quantity=2)  # prices 10, 11, 12
+        order, _ = self.checkout()
+
+        self.assertEqual(order.total_amount, Decimal("66.00"))
+        self.assertEqual(sorted(order.items.values_list("price", flat=True)), [10, 11, 12])
+        self.assertEqual(order.status_history.count(), 1)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_query_count_is_constant(self):
+        self.add_items(1)
+        _, small = self.checkout()
+        self.add_items(50)
+        _, large = self.checkout()
+        self.assertEqual(small, large)
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("benchmark_checkout", sizes=[1, 5], repeat=1, stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual([(row[0], row[1]) for row in rows], [
+            ("1", "legacy"), ("1", "bulk"), ("5", "legacy"), ("5", "bulk"),
+        ])
+        self.assertEqual(rows[1][3], rows[3][3])  # bulk path: same queries for 1 and 5
+        self.assertEqual(Order.objects.count(), 0)  # rolled back
+
+
+class GuestCartTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(title="Mug", price=Decimal("150.00"))
+        self.other = Product.objects.create(title="Plate", price=Decimal("80.00"))
+
+    def guest_add(self, product, quantity=1, token=None):
+        headers = {"X-Cart-Token": token} if token else {}
+        return self.client.post(
+            reverse("cart"), {"product_id": product.id, "quantity": quantity}, headers=headers
+        )
+
+    def test_browsing_creates_no_cart(self):
+        response = self.client.get(reverse("cart"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["items"], [])
+        self.assertFalse(Cart.objects.exists())
+
+    def test_token_identifies_the_guest_cart(self):
+        first = self.guest_add(self.product, 2)
+        token = first["X-Cart-Token"]
+        second = self.guest_add(self.other, token=token)
+
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(second.data["total_items"], 3)
+        self.assertEqual(Cart.objects.get().user, None)
+
+        # chhed-chhaad wala token -> naya cart, purana safe
+        forged = self.guest_add(self.product, token=token[:-2] + "xx")
+        self.assertNotEqual(forged.data["id"], first.data["id"])
+
+    def test_login_merges_guest_cart(self):
+        user = User.objects.create_user("buyer", password="pass12345")
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        token = self.guest_add(self.product, 2)["X-Cart-Token"]
+        self.guest_add(self.other, 4, token=token)
+
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "buyer", "password": "pass12345", "cart_token": token},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+        self.assertEqual(response.data["merged_cart_items"], 2)
+        self.assertEqual(
+            dict(cart.items.values_list("product_id", "quantity")),
+            {self.product.id: 3, self.other.id: 4},
+        )
+        self.assertEqual(Cart.objects.filter(user=None).count(), 0)
+
+        # same token dobara -> kuch merge nahi
+        again = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "buyer", "password": "pass12345", "cart_token": token},
+        )
+        self.assertEqual(again.data["merged_cart_items"], 0)
+
+    def test_merge_query_count_is_flat(self):
+        user = User.objects.create_user("buyer", password="pass12345")
+        Cart.objects.create(user=user)
+        products = Product.objects.bulk_create(
+            [Product(title=f"P{i}", price=Decimal("10.00")) for i in range(60)]
+        )
+
+        def merge(count):
+            guest = Cart.objects.create()
+            CartItem.objects.bulk_create(
+                [CartItem(cart=guest, product=p, quantity=1) for p in products[:count]]
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(store.merge_guest_cart(user, guest_token(guest)), count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(merge(2), merge(60))
+
+    def test_prune_deletes_only_expired_guest_carts(self):
+        user = User.objects.create_user("buyer", password="pass12345")
+        old_guest, fresh_guest = Cart.objects.create(), Cart.objects.create()
+        old_user_cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=old_guest, product=self.product)
+        Cart.objects.filter(id__in=[old_guest.id, old_user_cart.id]).update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+
+        call_command("prune_guest_carts", batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(
+            set(Cart.objects.values_list("id", flat=True)), {fresh_guest.id, old_user_cart.id}
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+
+class SweepCartsTests(CartTestMixin, APITestCase):
+    def age(self, carts, **delta):
+        Cart.objects.filter(id__in=[cart.id for cart in carts]).update(
+            created_at=timezone.now() - timedelta(**delta),
+            updated_at=timezone.now() - timedelta(**delta),
+        )
+
+    def test_opening_cart_marks_activity_at_most_once_per_resolution(self):
+        self.age([self.cart], days=5)
+        self.client.get(reverse("cart"))
+        self.cart.refresh_from_db()
+        self.assertLess(timezone.now() - self.cart.updated_at, timedelta(minutes=1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("cart"))
+        self.assertFalse(any("UPDATE" in q["sql"] for q in ctx.captured_queries))
+
+    def test_sweep_deletes_idle_carts_only(self):
+        self.add_items(1)
+        others = [User.objects.create_user(f"u{i}", password="pass12345") for i in range(3)]
+        idle_full, recent_empty, old_empty = [Cart.objects.create(user=u) for u in others]
+        CartItem.objects.create(cart=idle_full, product=self.make_product())
+        guest = Cart.objects.create()
+        self.age([idle_full], days=91)
+        self.age([old_empty], days=2)
+        self.age([self.cart], days=30)  # items hain, abhi idle limit ke andar
+        self.age([guest], days=31)
+
+        out = io.StringIO()
+        call_command("sweep_carts", batch_size=1, pause=0, stdout=out)
+
+        self.assertEqual(
+            set(Cart.objects.values_list("id", flat=True)), {self.cart.id, recent_empty.id}
+        )
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertIn("Deleted 3 idle carts", out.getvalue())
+
+    def test_sweep_is_bounded_per_batch(self):
+        users = [User.objects.create_user(f"u{i}", password="pass12345") for i in range(5)]
+        carts = [Cart.objects.create(user=u) for u in users]
+        self.age(carts, days=2)
+        empty = sweep.idle_rules()[1][1]
+
+        self.assertEqual(sweep.sweep(empty, batch_size=2, pause=0, max_batches=1), 2)
+        self.assertEqual(Cart.objects.filter(user__in=users).count(), 3)
+        self.assertEqual(sweep.sweep(empty, batch_size=2, pause=0), 3)
+
+
+@override_settings(CART_STORE="cache", CART_STORE_FLUSH_INTERVAL=0)
+class CachedCartStoreTests(CartTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        caches["carts"].clear()
+        store._stores.clear()
+        self.addCleanup(store._stores.clear)
+        self.store = store.get_cart_store()
+
+    def quantities(self):
+        return dict(
+            CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity")
+        )
+
+    def test_writes_stay_in_cache_until_flush(self):
+        [existing] = self.add_items(1, quantity=1)
+        new = self.make_product("New", "50.00")
+
+        self.client.post(reverse("cart"), {"product_id": new.id, "quantity": 2})
+        response = self.client.post(reverse("cart"), {"product_id": existing.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.cart.id)
+        self.assertEqual(response.data["total_items"], 4)
+        self.assertEqual(response.data["total_price"], 120.0)
+        self.assertEqual(self.quantities(), {existing.id: 1})
+
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(self.quantities(), {existing.id: 2, new.id: 2})
+        self.assertEqual(self.store.flush(), 0)
+
+    def test_flush_batches_many_carts(self):
+        products = [self.make_product(f"P{i}") for i in range(3)]
+        users = [User.objects.create_user(f"u{i}", password="pass12345") for i in range(5)]
+        for user in users:
+            self.client.force_authenticate(user)
+            self.client.post(
+                reverse("cart-batch"),
+                {"operations": [{"op": "add", "product_id": p.id} for p in products]},
+                format="json",
+            )
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.store.flush(), 5)
+        # carts check, products check, savepoint, DELETE, activity UPDATE, bulk upsert, release
+        self.assertLessEqual(len(ctx.captured_queries), 7)
+        self.assertEqual(CartItem.objects.filter(cart__user__in=users).count(), 15)
+
+    def test_get_from_cache_skips_cart_query(self):
+        self.add_items(3)
+        self.client.get(reverse("cart"))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("cart"))
+        self.assertEqual(len(response.data["items"]), 3)
+        # products + wishlist ids
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_patch_and_delete(self):
+        first, second = self.add_items(2, quantity=1)
+        item_id = CartItem.objects.get(product=first).id
+
+        self.client.patch(reverse("cart"), {"item_id": item_id, "quantity": 5})
+        response = self.client.delete(reverse("cart"), {"product_id": second.id})
+
+        self.assertEqual(response.data["total_items"], 5)
+        self.assertEqual(
+            self.client.patch(reverse("cart"), {"item_id": 999999}).status_code, 404
+        )
+        self.store.flush()
+        self.assertEqual(self.quantities(), {first.id: 5})
+
+    def test_flush_after_cart_was_swept_recreates_it(self):
+        product = self.make_product()
+        self.client.post(reverse("cart"), {"product_id": product.id, "quantity": 2})
+        Cart.objects.filter(id=self.cart.id).delete()  # dusre process ka sweeper
+
+        self.assertEqual(self.store.flush(), 1)
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual(cart.items.get().quantity, 2)
+        self.assertEqual(self.client.get(reverse("cart")).data["id"], cart.id)
+
+    def test_checkout_flushes_pending_changes(self):
+        product = self.make_product(price="25.00")
+        address = Address.objects.create(
+            user=self.user, full_name="Buyer", phone="9999999999", line1="Street 1",
+            city="Jaipur", state="RJ", pincode="302001",
+        )
+        self.client.post(reverse("cart"), {"product_id": product.id, "quantity": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("cart-checkout"), {"address_id": address.id})
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.items.get().quantity, 2)
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(self.client.get(reverse("cart")).data["items"], [])
+
+
+    def test_apply_when_state_vanishes_before_lock(self):
+        [existing] = self.add_items(1, quantity=1)
+        self.client.get(reverse("cart"))  # state cache me
+        new = self.make_product("New")
+        locked = store.CachedCartStore.lock
+        held = set()
+
+        @contextmanager
+        def lock(store_self, user_id):
+            # nested lock isi thread pe = deadlock (threading.Lock reentrant nahi)
+            self.assertNotIn(user_id, held)
+            with locked(store_self, user_id):
+                held.add(user_id)
+                caches["carts"].delete(store_self.key(user_id))  # forget() / cull beech me
+                try:
+                    yield
+                finally:
+                    held.discard(user_id)
+
+        with mock.patch.object(store.CachedCartStore, "lock", lock):
+            response = self.client.post(reverse("cart"), {"product_id": new.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_items"], 2)
+        self.store.flush()
+        self.assertEqual(self.quantities(), {existing.id: 1, new.id: 1})
+
+    def test_flush_user_reads_cart_changed_by_another_worker(self):
+        product = self.make_product()
+        self.client.post(reverse("cart"), {"product_id": product.id, "quantity": 3})
+        other_worker = store.CachedCartStore()  # shared cache, apna dirty set khaali
+
+        self.assertEqual(other_worker.flush(), 0)
+        self.assertEqual(other_worker.flush(self.user.id), 1)
+        self.assertEqual(self.quantities(), {product.id: 3})
+
+    def test_lost_dirty_cart_is_an_error(self):
+        product = self.make_product()
+        address = Address.objects.create(
+            user=self.user, full_name="Buyer", phone="9999999999", line1="Street 1",
+            city="Jaipur", state="RJ", pincode="302001",
+        )
+        self.client.post(reverse("cart"), {"product_id": product.id})
+        caches["carts"].delete(self.store.key(self.user.id))  # evicted
+
+        with self.assertLogs("cart.store", "ERROR"):
+            with self.assertRaises(store.CartStateLost):
+                self.store.flush(self.user.id)
+
+        self.client.post(reverse("cart"), {"product_id": product.id})
+        caches["carts"].delete(self.store.key(self.user.id))
+        with self.assertLogs("cart.store", "ERROR"):
+            response = self.client.post(reverse("cart-checkout"), {"address_id": address.id})
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+    @override_settings(CART_STORE_CACHE_ALIAS="default")
+    def test_locmem_cache_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            store.CachedCartStore()
+
+
+class ConcurrentAddToCartTests(TransactionTestCase):
+    workers = 12
+    adds_per_worker = 5
+
+    def test_parallel_adds_are_not_lost(self):
+        user = User.objects.create_user("racer", password="pass12345")
+        cart = Cart.objects.create(user=user)
+        product = Product.objects.create(title="Hot item", price=Decimal("99.00"))
+        barrier = threading.Barrier(self.workers)
+
+        def add():
+            barrier.wait()
+            try:
+                for _ in range(self.adds_per_worker):
+                    CartItem.add_quantity(cart.id, product.id, 1)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=add) for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(
+            CartItem.objects.get(cart=cart, product=product).quantity,
+            self.workers * self.adds_per_worker,
+        )
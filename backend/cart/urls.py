@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import CartView, CheckoutView  # ✅ ensure yahi hai
+from .views import CartView, CartBatchView, CheckoutView  # ✅ ensure yahi hai
 
 urlpatterns = [
     path("", CartView.as_view(), name="cart"),
+    path("batch/", CartBatchView.as_view(), name="cart-batch"),
     path("checkout/", CheckoutView.as_view(), name="cart-checkout"),
 ]
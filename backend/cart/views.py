@@ -2,32 +2,40 @@ from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 
-from .models import Cart, CartItem
-from .serializers import CartSerializer, CartItemSerializer
-from products.models import Product
-from orders.models import Order, OrderItem
+from . import guest
+from .serializers import CartBatchSerializer
+from .store import CartStateLost, get_cart_store, get_or_create_cart
+from orders.idempotency import run_idempotent
+from orders.models import Order
+from promotions.engine import price_lines
 from addresses.models import Address
+from inventory.stock import OutOfStock, reserve as reserve_stock
 
 
-def get_or_create_cart(request):
+class CartResponseMixin:
     """
-    Logged-in user ke liye: user-specific cart.
+    Guest ka pehla write naya cart banata hai - uska signed token
+    X-Cart-Token response header me jata hai, client agle requests me bheje.
     """
-    user = request.user
-    cart, _ = Cart.objects.get_or_create(user=user)
-    return cart
 
+    def cart_response(self, request, store):
+        response = Response(store.render(request), status=status.HTTP_200_OK)
+        token = getattr(request, "_guest_token", None)
+        if token:
+            response[guest.HEADER] = token
+        return response
 
-class CartView(APIView):
-    # Ab cart sirf authenticated users ke liye
-    permission_classes = [permissions.IsAuthenticated]
+
+class CartView(CartResponseMixin, APIView):
+    # Logged-in user ya guest (X-Cart-Token header, cart/guest.py)
+    # ?fields=id,title,price nested product rows ko narrow karta hai
+    # Storage settings.CART_STORE se aata hai (cart/store.py): "db" ya "cache"
+    permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        cart = get_or_create_cart(request)
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.cart_response(request, get_cart_store(request))
 
     def post(self, request):
         """
@@ -37,92 +45,169 @@ class CartView(APIView):
           "quantity": 2
         }
         """
-        cart = get_or_create_cart(request)
-        product_id = request.data.get("product_id")
-        quantity = int(request.data.get("quantity", 1))
-
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+            product_id = int(request.data.get("product_id"))
+            quantity = int(request.data.get("quantity", 1))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "product_id and quantity must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if quantity < 1:
+            return Response(
+                {"detail": "quantity must be at least 1"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = get_cart_store(request)
+        # db store: single atomic upsert - read-modify-write nahi, isliye lost updates nahi
+        if store.apply(request, [{"op": "add", "product_id": product_id, "quantity": quantity}]):
             return Response(
                 {"detail": "Product not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-        if not created:
-            item.quantity += quantity
-        else:
-            item.quantity = quantity
-        item.save()
+        return self.cart_response(request, store)
 
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def get_product_id(self, request, store):
+        """
+        Line ko item_id (purane clients) ya product_id se pehchano. Cache store
+        me naya line flush hone tak item_id null hota hai, tab product_id do.
+        """
+        try:
+            if request.data.get("product_id") is not None:
+                return int(request.data["product_id"])
+            return store.resolve_item(request, int(request.data.get("item_id")))
+        except (TypeError, ValueError):
+            return None
 
     def patch(self, request):
         """
         Update quantity:
         {
-          "item_id": 5,
+          "item_id": 5,          # ya "product_id": 1
           "quantity": 3
         }
         """
-        cart = get_or_create_cart(request)
-        item_id = request.data.get("item_id")
+        store = get_cart_store(request)
+        product_id = self.get_product_id(request, store)
         quantity = int(request.data.get("quantity", 1))
 
-        try:
-            item = CartItem.objects.get(id=item_id, cart=cart)
-        except CartItem.DoesNotExist:
+        if product_id is None:
             return Response(
                 {"detail": "Cart item not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
         if quantity <= 0:
-            item.delete()
+            operation = {"op": "remove", "product_id": product_id}
         else:
-            item.quantity = quantity
-            item.save()
+            operation = {"op": "set", "product_id": product_id, "quantity": quantity}
+        if store.apply(request, [operation]):
+            return Response(
+                {"detail": "Cart item not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.cart_response(request, store)
 
     def delete(self, request):
         """
         Remove item:
         {
-          "item_id": 5
+          "item_id": 5           # ya "product_id": 1
         }
         """
-        cart = get_or_create_cart(request)
-        item_id = request.data.get("item_id")
+        store = get_cart_store(request)
+        product_id = self.get_product_id(request, store)
 
-        try:
-            item = CartItem.objects.get(id=item_id, cart=cart)
-        except CartItem.DoesNotExist:
+        if product_id is None:
             return Response(
                 {"detail": "Cart item not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        item.delete()
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        store.apply(request, [{"op": "remove", "product_id": product_id}])
+        return self.cart_response(request, store)
+
+
+class CartBatchView(CartResponseMixin, APIView):
+    """
+    POST /api/cart/batch/
+    {
+      "operations": [
+        {"op": "add", "product_id": 1, "quantity": 2},
+        {"op": "set", "product_id": 7, "quantity": 1},
+        {"op": "remove", "product_id": 3}
+      ]
+    }
+
+    Saare operations ek transaction me apply hote hain (bulk create / update /
+    delete) aur final cart ek hi baar return hota hai. Guests bhi (X-Cart-Token).
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        store = get_cart_store(request)
+        try:
+            missing = store.apply(request, serializer.validated_data["operations"])
+        except IntegrityError:
+            # kisi parallel request ne same line abhi insert ki
+            return Response(
+                {"detail": "Cart changed concurrently, please retry"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if missing:
+            return Response(
+                {"detail": "Product not found", "product_ids": sorted(missing)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return self.cart_response(request, store)
 
 
 class CheckoutView(APIView):
     """
     POST /api/cart/checkout/
+    Idempotency-Key: <optional, unique per checkout attempt>
     {
-      "address_id": 1
+      "address_id": 1,
+      "coupon_code": "DIWALI10"   # optional
     }
+
+    409 {"detail": "Insufficient stock", "product_ids": [...]} agar kisi
+    tracked product (inventory.StockLevel) ka stock kam pade.
     """
 
     permission_classes = [permissions.IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
+        # Idempotency-Key header: mobile retry pe dobara checkout nahi, pehla result
+        return run_idempotent(request, "checkout", lambda: self.checkout(request))
+
+    def checkout(self, request):
+        # cache store ho to pehle pending changes DB me likh do - apne transaction
+        # me, taaki checkout fail/rollback ho to bhi cart DB me bacha rahe
+        store = get_cart_store()
+        try:
+            store.flush(request.user.id)
+        except CartStateLost:
+            store.forget(request.user.id)
+            return Response(
+                {
+                    "detail": "Your latest cart changes could not be saved. "
+                    "Please review your cart and try again."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return self.place_order(request, store)
+
+    @transaction.atomic
+    def place_order(self, request, store):
         user = request.user
         address_id = request.data.get("address_id")
 
@@ -132,10 +217,14 @@ class CheckoutView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # cart lo
+        # cart lo - ek query, sirf chahiye wale columns. Transaction IMMEDIATE hai
+        # (settings.DATABASES), write lock BEGIN se hi pakda hua hai - isliye
+        # place_order me sirf DB kaam, koi slow call nahi
         cart = get_or_create_cart(request)
-        items = cart.items.select_related("product")
-        if not items.exists():
+        lines = list(
+            cart.items.order_by("id").values_list("product_id", "quantity", "product__price")
+        )
+        if not lines:
             return Response(
                 {"detail": "Cart is empty"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -150,9 +239,26 @@ class CheckoutView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # order create with shipping snapshot
-        order = Order.objects.create(
-            user=user,
+        # promotions / coupon: wahi compiled rules jo CartView dikhata hai,
+        # discount order pe lock ho jata hai. Valid coupon jo kisi line pe nahi
+        # jeeta (dusri promotion behtar) checkout nahi rokta - "applied": false
+        coupon = request.data.get("coupon_code") or None
+        pricing = price_lines(lines, coupon)
+        if coupon and not pricing.coupon_valid:
+            return Response(
+                {"detail": "Coupon is not valid for this cart"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # order + items with shipping snapshot: total ek baar, items ek bulk insert
+        order = Order.place(
+            user,
+            [
+                {"product_id": product_id, "quantity": quantity, "price": price}
+                for product_id, quantity, price in lines
+            ],
+            discount_amount=pricing.discount,
+            coupon_code=pricing.coupon if pricing.coupon_applied else "",
             shipping_full_name=address.full_name,
             shipping_phone=address.phone,
             shipping_line1=address.line1,
@@ -162,21 +268,22 @@ class CheckoutView(APIView):
             shipping_pincode=address.pincode,
         )
 
-        # cart items -> order items
-        for item in items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price,
+        # stock reserve: tracked products ke liye ek conditional UPDATE; kam pade to
+        # poora checkout rollback (order bhi), koi oversell nahi
+        try:
+            reserve_stock(order, {product_id: quantity for product_id, quantity, _ in lines})
+        except OutOfStock as exc:
+            transaction.set_rollback(True)
+            return Response(
+                {"detail": "Insufficient stock", "product_ids": exc.product_ids},
+                status=status.HTTP_409_CONFLICT,
             )
 
-        # total auto update ho jayega OrderItem.save() se
-
         # cart clear
-        items.delete()
+        cart.items.all().delete()
+        transaction.on_commit(lambda: store.forget(user.id))
 
-        return Response(
-            {"detail": "Order created", "order_id": order.id},
-            status=status.HTTP_201_CREATED,
-        )
+        data = {"detail": "Order created", "order_id": order.id}
+        if pricing.coupon:
+            data["coupon"] = {"code": pricing.coupon, "applied": pricing.coupon_applied}
+        return Response(data, status=status.HTTP_201_CREATED)
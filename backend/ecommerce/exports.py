@@ -0,0 +1,104 @@
+"""
+Streaming export helpers shared by the catalog export (products/exports.py)
+and the order export (orders/exports.py): chunking, value encoding, JSONL /
+CSV streams, the streaming HTTP response and the export_* command base.
+
+The app modules only decide which rows to read and how one row turns into a
+JSON object or CSV rows; everything here works one chunk at a time, so memory
+stays bounded by the chunk size however many rows are exported.
+"""
+import csv
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def jsonable(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)  # Decimal
+
+
+def iter_jsonl(chunked, to_dict):
+    """
+    chunked: lists of rows; to_dict(row) -> one JSON object (one line).
+    """
+    for chunk in chunked:
+        yield "".join(json.dumps(to_dict(row), ensure_ascii=False) + "\n" for row in chunk)
+
+
+def iter_csv(chunked, header, to_rows):
+    """
+    chunked: lists of rows; to_rows(row) -> CSV rows for it (values are
+    encoded with jsonable). One string per chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for chunk in chunked:
+        writer.writerows(
+            [jsonable(value) for value in line] for row in chunk for line in to_rows(row)
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def streaming_response(stream, fmt, filename):
+    response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f"attachment; filename={filename}.{fmt}"
+    return response
+
+
+class ExportCommand(BaseCommand):
+    """
+    --format / --output / --chunk-size and the write loop for export_*
+    commands. Subclasses add their filters and implement
+    get_stream(fmt, chunk_size, options) -> iterable of strings.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(CONTENT_TYPES), default="jsonl")
+        parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def get_stream(self, fmt, chunk_size, options):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        stream = self.get_stream(options["format"], options["chunk_size"], options)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as out:
+                for chunk in stream:
+                    out.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            for chunk in stream:
+                self.stdout.write(chunk, ending="")
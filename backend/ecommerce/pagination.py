@@ -0,0 +1,235 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's own ordering.
+
+    The cursor stores the sort-key values of the boundary row, so every page is
+    a `WHERE (keys) > (cursor) ORDER BY keys LIMIT n` query: no OFFSET, no
+    COUNT, and rows inserted while a client is paging never shift or repeat
+    items. The primary key is appended as a tiebreaker when the ordering does
+    not already end in it.
+
+    Response shape: {"next": url|null, "previous": url|null, "results": [...]}
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 20
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(queryset)
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+
+        keys = self.keys
+        if reverse:
+            keys = [(name, not desc) for name, desc in keys]
+
+        queryset = queryset.order_by(
+            *[f"-{name}" if desc else name for name, desc in keys]
+        )
+        if position is not None:
+            queryset = queryset.filter(self.build_seek_filter(keys, position))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[: self.page_size]
+
+        if reverse:
+            page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        Returns [(field_name, descending), ...] ending in a unique key.
+        """
+        ordering = [
+            o for o in (queryset.query.order_by or self.ordering) if isinstance(o, str)
+        ] or list(self.ordering)
+
+        keys = []
+        for item in ordering:
+            desc = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = queryset.model._meta.pk.name
+            keys.append((name, desc))
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(name == pk_name for name, _ in keys):
+            keys.append((pk_name, keys[-1][1] if keys else True))
+        return keys
+
+    def build_seek_filter(self, keys, position):
+        """
+        (k1, k2, ...) strictly after `position` in the given ordering, spelled
+        as an OR of prefix-equality terms. The leading non-strict bound on the
+        first key lets SQLite turn the lookup into an index range scan.
+        """
+        first, first_desc = keys[0]
+        bound = Q(**{f"{first}__{'lte' if first_desc else 'gte'}": position[0]})
+
+        after = Q()
+        for i, (name, desc) in enumerate(keys):
+            term = Q(**{f"{name}__{'lt' if desc else 'gt'}": position[i]})
+            for j in range(i):
+                term &= Q(**{keys[j][0]: position[j]})
+            after |= term
+        return bound & after
+
+    def load_cursor(self, request):
+        """
+        Raw cursor payload -> (values list, reverse), (None, False) if absent.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values = payload["v"]
+            if not isinstance(values, list):
+                raise ValueError
+            return values, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def dump_cursor(self, values, reverse=False):
+        payload = {"v": list(values)}
+        if reverse:
+            payload["r"] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        raw_values, reverse = self.load_cursor(request)
+        if raw_values is None:
+            return None, False
+
+        try:
+            if len(raw_values) != len(self.keys):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.keys, raw_values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def encode_cursor(self, obj, reverse):
+        values = [
+            self.model._meta.get_field(name).value_to_string(obj)
+            for name, _ in self.keys
+        ]
+        return self.dump_cursor(values, reverse)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class RankedCursorPagination(KeysetCursorPagination):
+    """
+    The same cursor and page-size handling for rows that come from a ranked
+    query rather than a queryset (e.g. FTS search ordered by score, id).
+
+    The view passes `fetch(after, limit)`, which must return rows ordered by
+    their sort key, strictly after `after` (None for the first page), and
+    `key(row)`, the JSON-serialisable sort key stored in the next cursor.
+    Forward-only: there is no previous link.
+    """
+
+    def paginate_rows(self, request, fetch, key, parse=tuple):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        raw_values, _ = self.load_cursor(request)
+        after = None
+        if raw_values is not None:
+            try:
+                after = parse(raw_values)
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = fetch(after, self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        self.has_previous = False
+        self.page = rows[: self.page_size]
+        self.next_position = key(self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.dump_cursor(self.next_position)
+
+    def get_previous_link(self):
+        return None
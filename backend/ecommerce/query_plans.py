@@ -0,0 +1,36 @@
+"""
+EXPLAIN QUERY PLAN helpers for the index regression tests in each app.
+"""
+from django.db import connection
+
+
+def explain(queryset):
+    """
+    SQLite query plan for a queryset as a list of detail strings, e.g.
+    ["SEARCH orders_order USING INDEX order_user_recent_idx (user_id=?)"].
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanAssertions:
+    def assertUsesIndex(self, queryset, index_name, allow_sort=False):
+        """
+        The plan must read through `index_name` and never full-scan a table.
+        Unless `allow_sort` is set (range filter on one column, ORDER BY on
+        another), the ORDER BY must be served by the index too.
+        """
+        plan = explain(queryset)
+        text = "\n".join(plan)
+        self.assertTrue(
+            any(f"INDEX {index_name}" in step for step in plan),
+            f"{index_name} not used:\n{text}",
+        )
+        self.assertFalse(
+            any(step.startswith("SCAN ") and "INDEX" not in step for step in plan),
+            f"full table scan:\n{text}",
+        )
+        if not allow_sort:
+            self.assertNotIn("TEMP B-TREE", text, f"sort not served by index:\n{text}")
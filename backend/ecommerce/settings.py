@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = "change-this-to-your-secret-key"  # tumhare file me jo bhi hai, wahi rehne do
@@ -30,6 +32,8 @@ INSTALLED_APPS = [
     "cart",
     "orders",
     "addresses",  # ✅ NEW
+    "inventory",
+    "promotions",
 ]
 
 MIDDLEWARE = [
@@ -66,9 +70,68 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Concurrent checkouts: har transaction shuru me hi write lock le
+            # (IMMEDIATE) aur busy ho to `timeout` sec tak wait kare. Deferred
+            # BEGIN pe read->write upgrade turant "database is locked" deta hai.
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+            # WAL: writes ke dauran bhi readers block nahi hote
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+        },
+        # file-based test DB, taaki threaded tests real locking behaviour dekhein
+        # (in-memory shared cache busy timeout follow nahi karta)
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# Cache: locmem by default; production me Redis/Memcached backend yahan swap karo
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shopvely-default",
+    },
+    # cart write-behind state (CART_STORE="cache"): shared by every worker on
+    # the host and never culled - unflushed carts must not be evicted. Point
+    # it at Redis / memcached when workers span hosts.
+    "carts": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache" / "carts",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 10_000_000},
+    },
+}
+
+# Anonymous product list/detail read-through cache (products/cache.py)
+CATALOG_CACHE_ALIAS = "default"
+CATALOG_CACHE_TIMEOUT = 300  # seconds
+CATALOG_CACHE_LOCK_TIMEOUT = 10  # seconds a miss may take to rebuild
+
+# Compiled promotion rules (promotions/engine.py): the version counter lives in
+# PROMOTIONS_CACHE_ALIAS; on a per-process cache other workers only see a
+# change once their compiled rules are older than PROMOTIONS_RULES_TTL
+PROMOTIONS_CACHE_ALIAS = "default"
+PROMOTIONS_RULES_TTL = 60  # seconds
+
+# Cart storage (cart/store.py): "db" writes every change through, "cache" keeps
+# the active cart in CART_STORE_CACHE_ALIAS and flushes it in batches
+CART_STORE = "db"
+CART_STORE_CACHE_ALIAS = "carts"
+CART_STORE_FLUSH_INTERVAL = 5  # seconds between write-behind flushes, 0 = checkout only
+GUEST_CART_MAX_AGE = 30 * 24 * 3600  # guest cart token lifetime; prune_guest_carts deletes older carts
+
+# Idle cart cleanup (cart/sweep.py, manage.py sweep_carts)
+CART_ACTIVITY_RESOLUTION = 3600  # opening the cart bumps Cart.updated_at at most this often
+CART_IDLE_MAX_AGE = 90 * 24 * 3600  # any cart untouched this long is deleted
+CART_EMPTY_MAX_AGE = 24 * 3600  # empty carts go sooner
+CART_SWEEP_BATCH_SIZE = 500  # carts deleted per transaction
+CART_SWEEP_PAUSE = 0.05  # seconds between batches, lets checkouts take the write lock
+CART_SWEEP_INTERVAL = 0  # >0 = also sweep in-process every N seconds
+
+# Idempotency-Key replay window for checkout / order create (orders/idempotency.py)
+IDEMPOTENCY_KEY_TTL = 24 * 3600  # seconds; prune_idempotency_keys deletes older keys
+IDEMPOTENCY_IN_PROGRESS_LEASE = 60  # seconds an unfinished request holds its key
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -128,6 +191,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+# guest cart token (cart/guest.py) + Idempotency-Key (orders/idempotency.py) headers
+CORS_ALLOW_HEADERS = (*default_headers, "x-cart-token", "idempotency-key")
+CORS_EXPOSE_HEADERS = ["X-Cart-Token", "Idempotent-Replayed"]
 # CORS_ALLOW_ALL_ORIGINS = True  # sirf dev testing ke लिए, prod me mat rakhna
 
 # Static files (CSS, JS, Images)
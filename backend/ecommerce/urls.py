@@ -1,9 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from users.views import LoginView
 
 urlpatterns = [
     # Django admin
@@ -16,7 +15,7 @@ urlpatterns = [
     path("api/orders/", include("orders.urls")),
     path("api/addresses/", include("addresses.urls")),  # ✅ NEW
 
-    # JWT auth
-    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    # JWT auth (login guest cart ko bhi merge karta hai)
+    path("api/token/", LoginView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
@@ -0,0 +1,37 @@
+"""
+Version counters behind versioned caches (catalog pages in products/cache.py,
+compiled promotion rules in promotions/engine.py).
+
+Readers build keys from the current version, or remember the version they
+built from; one bump orphans everything built from the old one at once.
+"""
+import time
+
+from django.db import connection, transaction
+
+
+def get_version(cache, key):
+    version = cache.get(key)
+    if version is None:
+        # time-based seed, so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(cache, key):
+    """
+    Bump now and again after commit: the first bump stops this transaction's
+    own reads from using old data, the second drops anything a concurrent
+    reader rebuilt from pre-commit data in between.
+    """
+    bump_version(cache, key)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: bump_version(cache, key))
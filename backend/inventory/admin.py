@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import StockLevel, StockReservation
+
+
+@admin.register(StockLevel)
+class StockLevelAdmin(admin.ModelAdmin):
+    list_display = ("product", "on_hand", "updated_at")
+    list_editable = ("on_hand",)
+    list_select_related = ("product",)
+    raw_id_fields = ("product",)
+    search_fields = ("product__title", "product__sku")
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("order", "product", "quantity", "created_at")
+    list_select_related = ("product",)
+    raw_id_fields = ("order", "product")
@@ -0,0 +1,52 @@
+from django.db import models
+
+from orders.models import Order
+from products.models import Product
+
+
+class StockLevel(models.Model):
+    """
+    Units on hand for one product. Products without a row are not tracked
+    (unlimited), so inventory can be switched on product by product.
+
+    Alag table (Product pe column nahi) taaki har checkout ka stock UPDATE
+    catalog row, search index aur catalog cache ko na chhede.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stock",
+    )
+    on_hand = models.PositiveIntegerField(
+        default=0,
+        help_text="Units available to sell (reserved units already subtracted)",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(on_hand__gte=0), name="stock_on_hand_not_negative"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.on_hand} on hand"
+
+
+class StockReservation(models.Model):
+    """
+    Units taken from stock by one order line; cancel pe wapas (inventory.stock.release).
+    """
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="stock_reservations"
+    )
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.quantity} x product {self.product_id}"
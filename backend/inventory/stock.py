@@ -0,0 +1,77 @@
+"""
+Stock reservation / release, set-based.
+
+reserve() subtracts every tracked line of an order with ONE conditional
+UPDATE (on_hand >= wanted per row). SQLite runs it under the write lock, so
+two checkouts can never both take the last unit. No select_for_update, no
+per-row loop. If any line is short, nothing is kept: OutOfStock is raised
+and the caller's transaction rolls back.
+"""
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import StockLevel, StockReservation
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products {self.product_ids}")
+
+
+def _per_product(quantities):
+    # product_id -> quantity, as one CASE expression
+    return Case(
+        *[When(product_id=pid, then=Value(qty)) for pid, qty in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def reserve(order, quantities):
+    """
+    {product_id: quantity} for `order`. Untracked products (no StockLevel)
+    are skipped. Must run inside the order's transaction.
+    Queries: tracked ids SELECT + one UPDATE + one bulk INSERT.
+    """
+    tracked = set(
+        StockLevel.objects.filter(product_id__in=quantities).values_list("product_id", flat=True)
+    )
+    if not tracked:
+        return
+    wanted = {pid: qty for pid, qty in quantities.items() if pid in tracked}
+    amount = _per_product(wanted)
+    updated = (
+        StockLevel.objects.filter(product_id__in=wanted, on_hand__gte=amount)
+        .update(on_hand=F("on_hand") - amount)
+    )
+    if updated != len(wanted):
+        # kuch rows update nahi hui = stock kam; caller ka transaction rollback karega
+        short = set(
+            StockLevel.objects.filter(product_id__in=wanted, on_hand__lt=amount)
+            .values_list("product_id", flat=True)
+        )
+        raise OutOfStock(short or wanted)
+    StockReservation.objects.bulk_create(
+        [StockReservation(order=order, product_id=pid, quantity=qty) for pid, qty in wanted.items()]
+    )
+
+
+def release(order_ids):
+    """
+    Cancelled orders ka reserved stock wapas, chahe kitne bhi orders hon:
+    one grouped SELECT, one UPDATE, one DELETE. Reservations are deleted, so
+    releasing the same order twice is a no-op. Call inside a transaction.
+    """
+    reservations = StockReservation.objects.filter(order_id__in=order_ids)
+    returned = dict(
+        reservations.order_by()
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+    if not returned:
+        return 0
+    StockLevel.objects.filter(product_id__in=returned).update(
+        on_hand=F("on_hand") + _per_product(returned)
+    )
+    reservations.delete()
+    return sum(returned.values())
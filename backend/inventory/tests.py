@@ -0,0 +1,138 @@
+from decimal import Decimal
+import threading
+import time
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from addresses.models import Address
+from cart.models import Cart, CartItem
+from cart.views import CheckoutView
+from orders.admin import cancel_orders
+from orders.models import Order
+from products.models import Product
+from .models import StockLevel, StockReservation
+from .stock import OutOfStock, release, reserve
+
+User = get_user_model()
+
+
+def make_buyer(username, product, quantity=1):
+    user = User.objects.create(username=username)
+    address = Address.objects.create(
+        user=user, full_name=username, phone="9999999999", line1="Street 1",
+        city="Jaipur", state="RJ", pincode="302001",
+    )
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return user, address
+
+
+class StockTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="buyer")
+        self.order = Order.objects.create(user=self.user)
+        self.a, self.b, self.untracked = [
+            Product.objects.create(title=t, price=Decimal("10.00")) for t in "abc"
+        ]
+        StockLevel.objects.bulk_create(
+            [StockLevel(product=self.a, on_hand=5), StockLevel(product=self.b, on_hand=1)]
+        )
+
+    def on_hand(self):
+        return dict(StockLevel.objects.values_list("product_id", "on_hand"))
+
+    def test_reserve_and_release(self):
+        with CaptureQueriesContext(connection) as ctx:
+            reserve(self.order, {self.a.id: 3, self.b.id: 1, self.untracked.id: 9})
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(self.on_hand(), {self.a.id: 2, self.b.id: 0})
+
+        self.assertEqual(release([self.order.id]), 4)
+        self.assertEqual(self.on_hand(), {self.a.id: 5, self.b.id: 1})
+        self.assertEqual(release([self.order.id]), 0)  # dobara release no-op
+
+    def test_short_line_raises(self):
+        with self.assertRaises(OutOfStock) as ctx:
+            reserve(self.order, {self.a.id: 1, self.b.id: 2})
+        self.assertEqual(ctx.exception.product_ids, [self.b.id])
+
+
+class CheckoutStockTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(title="Hot item", price=Decimal("99.00"))
+        StockLevel.objects.create(product=self.product, on_hand=2)
+        self.user, self.address = make_buyer("buyer", self.product, quantity=3)
+        self.client.force_authenticate(self.user)
+
+    def checkout(self):
+        return self.client.post(reverse("cart-checkout"), {"address_id": self.address.id})
+
+    def test_oversell_rolls_back_whole_checkout(self):
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["product_ids"], [self.product.id])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+        self.assertEqual(StockLevel.objects.get().on_hand, 2)
+
+    def test_admin_cancel_releases_stock(self):
+        CartItem.objects.update(quantity=2)
+        order_id = self.checkout().data["order_id"]
+        self.assertEqual(StockLevel.objects.get().on_hand, 0)
+
+        request = RequestFactory().post("/")
+        request.user = User.objects.create(username="staff", is_staff=True)
+        queryset = Order.objects.filter(id=order_id)
+        cancel_orders(site._registry[Order], request, queryset)
+        cancel_orders(site._registry[Order], request, queryset)
+
+        self.assertEqual(StockLevel.objects.get().on_hand, 2)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class ConcurrentCheckoutStockTests(TransactionTestCase):
+    buyers = 200
+    stock = 50
+
+    def test_hot_product_never_oversells(self):
+        product = Product.objects.create(title="Hot item", price=Decimal("99.00"))
+        StockLevel.objects.create(product=product, on_hand=self.stock)
+        buyers = [make_buyer(f"buyer{i}", product) for i in range(self.buyers)]
+        view = CheckoutView.as_view()
+        factory = APIRequestFactory()
+        barrier = threading.Barrier(self.buyers)
+        results = []
+
+        def checkout(user, address):
+            barrier.wait()
+            try:
+                request = factory.post("/api/cart/checkout/", {"address_id": address.id})
+                force_authenticate(request, user)
+                # koi retry nahi: IMMEDIATE transactions busy timeout tak wait karte hain
+                results.append(view(request).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=buyer) for buyer in buyers]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(results.count(201), self.stock)
+        self.assertEqual(results.count(409), self.buyers - self.stock)
+        self.assertEqual(StockLevel.objects.get().on_hand, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
+        self.assertEqual(
+            sum(StockReservation.objects.values_list("quantity", flat=True)), self.stock
+        )
+        self.assertLess(elapsed, 60)
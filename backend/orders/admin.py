@@ -3,8 +3,10 @@ from django.http import HttpResponse
 from django.urls import path
 from django.utils.html import format_html
 
-import csv
+from ecommerce.exports import streaming_response
+from .exports import export_queryset, iter_export
 from .models import Order, OrderItem, OrderStatusHistory
+from .transitions import transition
 from django.template.loader import render_to_string
 
 # Agar later WeasyPrint use karoge to:
@@ -28,84 +30,47 @@ class OrderStatusHistoryInline(admin.TabularInline):
     fields = ("old_status", "new_status", "changed_by", "changed_at")
 
 
+def set_status_action(modeladmin, request, queryset, status):
+    # poora selection ek transaction me, state machine ke through
+    result = transition(queryset, status, changed_by=request.user)
+    message = f"{len(result.changed)} order(s) marked as {status}."
+    if result.rejected:
+        message += f" {len(result.rejected)} skipped (can't move to {status} from their status)."
+    modeladmin.message_user(request, message, fail_silently=True)
+
+
 @admin.action(description="Mark selected orders as Shipped")
 def mark_as_shipped(modeladmin, request, queryset):
-    for order in queryset:
-        old = order.status
-        if old != "shipped":
-            order.status = "shipped"
-            order.save(update_fields=["status"])
-            OrderStatusHistory.objects.create(
-                order=order,
-                old_status=old,
-                new_status="shipped",
-                changed_by=request.user,
-            )
+    set_status_action(modeladmin, request, queryset, "shipped")
 
 
 @admin.action(description="Mark selected orders as Delivered")
 def mark_as_delivered(modeladmin, request, queryset):
-    for order in queryset:
-        old = order.status
-        if old != "delivered":
-            order.status = "delivered"
-            order.save(update_fields=["status"])
-            OrderStatusHistory.objects.create(
-                order=order,
-                old_status=old,
-                new_status="delivered",
-                changed_by=request.user,
-            )
+    set_status_action(modeladmin, request, queryset, "delivered")
 
 
 @admin.action(description="Cancel selected orders")
 def cancel_orders(modeladmin, request, queryset):
-    for order in queryset:
-        old = order.status
-        if old != "cancelled":
-            order.status = "cancelled"
-            order.save(update_fields=["status"])
-            OrderStatusHistory.objects.create(
-                order=order,
-                old_status=old,
-                new_status="cancelled",
-                changed_by=request.user,
-            )
+    # reserved stock bhi wapas (transition ka on_enter)
+    set_status_action(modeladmin, request, queryset, "cancelled")
+
+
+def export_action(queryset, fmt):
+    # streaming: chunk by chunk, poora export memory me nahi banta
+    return streaming_response(iter_export(fmt, export_queryset(queryset)), fmt, "orders_export")
 
 
 @admin.action(description="Export selected orders to CSV")
 def export_orders_as_csv(modeladmin, request, queryset):
     """
-    Simple CSV export of selected orders.
+    Selected orders + line items + shipping snapshot, one row per item.
     """
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = "attachment; filename=orders_export.csv"
-
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "ID",
-            "Customer",
-            "Email",
-            "Status",
-            "Total Amount",
-            "Created At",
-        ]
-    )
-
-    for order in queryset.select_related("user"):
-        writer.writerow(
-            [
-                order.id,
-                getattr(order.user, "username", ""),
-                getattr(order.user, "email", ""),
-                order.status,
-                order.total_amount,
-                order.created_at,
-            ]
-        )
+    return export_action(queryset, "csv")
 
-    return response
+
+@admin.action(description="Export selected orders to JSONL")
+def export_orders_as_jsonl(modeladmin, request, queryset):
+    return export_action(queryset, "jsonl")
 
 
 @admin.register(Order)
@@ -116,8 +81,17 @@ class OrderAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
     inlines = [OrderItemInline, OrderStatusHistoryInline]
     ordering = ("-created_at",)  # latest orders sabse upar
-
-    actions = [mark_as_shipped, mark_as_delivered, cancel_orders, export_orders_as_csv]
+    # status sirf actions / API se (transitions.transition) - form se seedha
+    # edit history aur stock release dono skip kar deta
+    readonly_fields = ("status",)
+
+    actions = [
+        mark_as_shipped,
+        mark_as_delivered,
+        cancel_orders,
+        export_orders_as_csv,
+        export_orders_as_jsonl,
+    ]
 
     def get_urls(self):
         urls = super().get_urls()
@@ -0,0 +1,113 @@
+"""
+Streaming order export (JSONL / CSV) with line items and the shipping
+snapshot, shared by the admin actions, the staff API endpoint and
+`manage.py export_orders`.
+
+Orders are read with values_list().iterator(chunk_size=...) in
+(created_at, id) order. For each chunk the items of just those orders come
+from ONE query, and the chunk is encoded and yielded before the next one is
+read, so memory stays bounded by the chunk size however many orders match.
+
+JSONL: one order per line with a nested "items" list.
+CSV: one row per line item, the order columns repeated; an order without
+items gets one row with empty item columns.
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ecommerce.exports import CHUNK_SIZE, chunks, iter_csv, iter_jsonl, jsonable
+from .models import Order, OrderItem
+
+ORDER_FIELDS = (
+    "id",
+    "created_at",
+    "status",
+    "user_id",
+    "user__username",
+    "user__email",
+    "total_amount",
+    "discount_amount",
+    "coupon_code",
+    "shipping_full_name",
+    "shipping_phone",
+    "shipping_line1",
+    "shipping_line2",
+    "shipping_city",
+    "shipping_state",
+    "shipping_pincode",
+)
+ORDER_COLUMNS = tuple(
+    {"user__username": "username", "user__email": "email"}.get(name, name)
+    for name in ORDER_FIELDS
+)
+ITEM_FIELDS = ("product_id", "product__title", "quantity", "price")
+ITEM_COLUMNS = ("product_id", "product_title", "quantity", "price")
+EMPTY_ITEM = ("",) * len(ITEM_COLUMNS)
+
+
+def parse_bound(value):
+    """
+    ISO 8601 datetime or date -> aware datetime; ValueError if neither.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{value!r} is not an ISO 8601 date or datetime")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_queryset(queryset=None, created_from=None, created_to=None, status=None):
+    """
+    Orders placed in [created_from, created_to), oldest first. `queryset`
+    narrows it further (admin selection).
+    """
+    queryset = Order.objects.all() if queryset is None else queryset
+    if created_from is not None:
+        queryset = queryset.filter(created_at__gte=created_from)
+    if created_to is not None:
+        queryset = queryset.filter(created_at__lt=created_to)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by("created_at", "id").values_list(*ORDER_FIELDS)
+
+
+def _with_items(queryset, chunk_size):
+    """
+    (order row, [item rows]) - har chunk ke items ek query me.
+    """
+    for chunk in chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        items = {}
+        for order_id, *item in (
+            OrderItem.objects.filter(order_id__in=[row[0] for row in chunk])
+            .order_by("order_id", "id")
+            .values_list("order_id", *ITEM_FIELDS)
+        ):
+            items.setdefault(order_id, []).append(item)
+        yield [(row, items.get(row[0], [])) for row in chunk]
+
+
+def _as_dict(pair):
+    row, items = pair
+    return {
+        **dict(zip(ORDER_COLUMNS, map(jsonable, row))),
+        "items": [dict(zip(ITEM_COLUMNS, map(jsonable, item))) for item in items],
+    }
+
+
+def _as_rows(pair):
+    # ek row per item; bina items ke order ki ek row, item columns khaali
+    row, items = pair
+    return [row + tuple(item) for item in items or [EMPTY_ITEM]]
+
+
+def iter_export(fmt, queryset, chunk_size=CHUNK_SIZE):
+    chunked = _with_items(queryset, chunk_size)
+    if fmt == "csv":
+        return iter_csv(chunked, ORDER_COLUMNS + ITEM_COLUMNS, _as_rows)
+    return iter_jsonl(chunked, _as_dict)
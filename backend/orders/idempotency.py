@@ -0,0 +1,134 @@
+"""
+Idempotency-Key support for POST endpoints that create orders
+(checkout, order create).
+
+A client sends `Idempotency-Key: <unique string>` with the request. The first
+request with a key reserves a row (user, scope, key) and stores the response
+once the view returns. A retry with the same key inside IDEMPOTENCY_KEY_TTL
+gets that stored response back (plus `Idempotent-Replayed: true`) without
+running the view again. Edge cases:
+
+- the same key with a different request body -> 422
+- a retry while the first request is still running -> 409
+- 5xx / exceptions free the key so the client can retry for real; so do
+  409s (out of stock, lost cart changes), which ask for a retry themselves
+
+The response is saved after the view's own transaction commits. A crash in
+between leaves the key "in progress"; it is never replayed as a success it
+didn't have. After IDEMPOTENCY_IN_PROGRESS_LEASE a retry with the same body
+takes the key over and runs the view again, so the lease must be longer
+than any real checkout takes.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 3600))
+
+
+def lease():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_IN_PROGRESS_LEASE", 60))
+
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, "lists"):  # QueryDict (form / multipart)
+        data = dict(data.lists())
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{payload}".encode()).hexdigest()
+
+
+def replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if record.status_code is None:
+        return Response(
+            {"detail": "A request with this Idempotency-Key is still in progress."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = Response(record.response_body, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def reserve(request, scope, key, fingerprint):
+    """
+    (record, None) agar ye pehli request hai, warna (None, replay response).
+    Ek unique-index lookup; miss pe ek INSERT.
+    """
+    lookup = {"user": request.user, "scope": scope, "key": key}
+    record = IdempotencyKey.objects.filter(**lookup).first()
+    if record is not None:
+        now = timezone.now()
+        if record.created_at < now - ttl():
+            record.delete()  # expired, abhi tak prune nahi hua
+        elif (
+            record.status_code is None
+            and record.request_hash == fingerprint
+            and record.created_at < now - lease()
+        ):
+            # "in progress" lease khatam (request crash ho gayi) - key le lo.
+            # Beech me response save ho gaya to delete kuch nahi karta aur
+            # neeche ka INSERT replay pe gir jaata hai.
+            IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+        else:
+            return None, replay(record, fingerprint)
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(request_hash=fingerprint, **lookup), None
+    except IntegrityError:
+        # parallel retry ne abhi reserve kiya
+        return None, replay(IdempotencyKey.objects.get(**lookup), fingerprint)
+
+
+def run_idempotent(request, scope, handler):
+    """
+    View ke andar: `return run_idempotent(request, "checkout", lambda: ...)`.
+    Header na ho to handler seedha chalta hai.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    fingerprint = request_fingerprint(request)
+    record, response = reserve(request, scope, key, fingerprint)
+    if response is not None:
+        return response
+
+    try:
+        response = handler()
+    except Exception:
+        record.delete()
+        raise
+    if response.status_code >= 500 or response.status_code == status.HTTP_409_CONFLICT:
+        # retryable - same key se agli koshish view dobara chalaye
+        record.delete()
+        return response
+
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=response.status_code, response_body=response.data
+    )
+    return response
+
@@ -0,0 +1,93 @@
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from orders.models import Order, OrderItem
+from orders.serializers import OrderSerializer
+from products.models import Product
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class LegacyOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ["id", "product", "quantity", "price"]
+
+
+class LegacyOrderSerializer(OrderSerializer):
+    """
+    Purana create path (per-item product lookup, OrderItem.objects.create ->
+    update_total har item pe), sirf comparison ke liye.
+    """
+
+    items = LegacyOrderItemSerializer(many=True)
+
+    def create(self, validated_data):
+        items_data = validated_data.pop("items", [])
+        order = Order.objects.create(user=self.context["request"].user, **validated_data)
+        for item_data in items_data:
+            OrderItem.objects.create(order=order, **item_data)
+        order.update_total()
+        return order
+
+
+class Command(BaseCommand):
+    help = (
+        "Time POST /api/orders/ order creation (validate + save, latency + "
+        "query count) for several item counts, legacy per-item path vs the "
+        "bulk path. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or min(options["sizes"]) < 1:
+            raise CommandError("--sizes and --repeat must be positive")
+        try:
+            with transaction.atomic():
+                self.run(options["sizes"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat):
+        user = User.objects.create_user("order-bench", password="unused-bench-pass")
+        context = {"request": SimpleNamespace(user=user)}
+        products = Product.objects.bulk_create(
+            [Product(title=f"Bench {i}", price=Decimal("99.00")) for i in range(max(sizes))]
+        )
+
+        self.stdout.write(f"{'items':>6} {'path':>7} {'ms':>9} {'queries':>8}")
+        for size in sizes:
+            payload = {
+                "items": [
+                    {"product": p.id, "quantity": 2, "price": "99.00"} for p in products[:size]
+                ]
+            }
+            for name, serializer_class in (("legacy", LegacyOrderSerializer), ("bulk", OrderSerializer)):
+                timings = []
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        serializer = serializer_class(data=payload, context=context)
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                        timings.append(time.perf_counter() - started)
+                timings.sort()
+                median = timings[len(timings) // 2] * 1000
+                self.stdout.write(
+                    f"{size:>6} {name:>7} {median:>9.2f} {len(ctx.captured_queries):>8}"
+                )
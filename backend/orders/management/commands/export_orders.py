@@ -0,0 +1,34 @@
+from django.core.management.base import CommandError
+
+from ecommerce.exports import ExportCommand
+from orders.exports import export_queryset, iter_export, parse_bound
+from orders.models import Order
+
+
+class Command(ExportCommand):
+    help = (
+        "Stream orders with line items and the shipping snapshot as JSONL or "
+        "CSV to stdout or a file."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--created-from", help="Only orders placed at/after this ISO 8601 date or datetime"
+        )
+        parser.add_argument(
+            "--created-to", help="Only orders placed before this ISO 8601 date or datetime"
+        )
+        parser.add_argument("--status", choices=[value for value, _ in Order.STATUS_CHOICES])
+
+    def get_stream(self, fmt, chunk_size, options):
+        bounds = {}
+        for name in ("created_from", "created_to"):
+            if options[name]:
+                try:
+                    bounds[name] = parse_bound(options[name])
+                except ValueError as exc:
+                    raise CommandError(str(exc))
+
+        queryset = export_queryset(status=options["status"], **bounds)
+        return iter_export(fmt, queryset, chunk_size)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.idempotency import ttl
+from orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL, a "
+        "bounded batch per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Keys deleted per transaction (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        expired = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - ttl())
+        started = time.monotonic()
+        deleted = 0
+        while True:
+            # idempotency_created_idx se oldest batch, har DELETE apna chhota transaction
+            ids = list(expired.order_by("created_at").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            IdempotencyKey.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired idempotency keys in {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -1,3 +1,6 @@
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.db.models import Sum, F
 from django.contrib.auth import get_user_model
@@ -44,6 +47,19 @@ class Order(models.Model):
         help_text="Total amount for this order in INR",
     )
 
+    discount_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name="Discount (₹)",
+        help_text="Promotion / coupon discount locked in at checkout",
+    )
+    coupon_code = models.CharField(
+        max_length=40,
+        blank=True,
+        help_text="Coupon applied at checkout, if any",
+    )
+
     # ✅ Shipping address snapshot
     shipping_full_name = models.CharField(
         max_length=255,
@@ -81,6 +97,16 @@ class Order(models.Model):
         help_text="Pincode at the time of order",
     )
 
+    class Meta:
+        indexes = [
+            # "my orders" list: filter user, newest first
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="order_user_recent_idx"
+            ),
+            # admin changelist ordering / date_hierarchy
+            models.Index(fields=["-created_at", "-id"], name="order_recent_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
 
@@ -88,9 +114,27 @@ class Order(models.Model):
         total = self.items.aggregate(
             total=Sum(F("price") * F("quantity"))
         )["total"] or 0
-        self.total_amount = total
+        self.total_amount = max(total - self.discount_amount, 0)
         super().save(update_fields=["total_amount"])
 
+    @classmethod
+    def place(cls, user, lines, **fields):
+        """
+        Order + uske saare items, query count cart size pe depend nahi karta:
+        total memory me ek pass me, order INSERT usi total ke saath, items ek
+        bulk_create me (OrderItem.save / update_total per item nahi chalta).
+
+        `lines`: dicts of OrderItem fields - product (or product_id), quantity,
+        price. `discount_amount` (in fields) is subtracted from the total,
+        never below zero (same as update_total). Call inside a transaction.
+        """
+        lines = list(lines)
+        total = sum((line["price"] * line["quantity"] for line in lines), Decimal("0"))
+        total = max(total - (fields.get("discount_amount") or 0), 0)
+        order = cls.objects.create(user=user, total_amount=total, **fields)
+        OrderItem.objects.bulk_create([OrderItem(order=order, **line) for line in lines])
+        return order
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(
@@ -122,6 +166,7 @@ class OrderItem(models.Model):
         return f"{self.product.title} x {self.quantity}"
 
     def save(self, *args, **kwargs):
+        # single item add/edit (admin etc.); bulk paths use Order.place
         super().save(*args, **kwargs)
         self.order.update_total()
 
@@ -166,20 +211,56 @@ class OrderStatusHistory(models.Model):
         verbose_name = "Order status history"
         verbose_name_plural = "Order status history"
         ordering = ["-changed_at"]
+        indexes = [
+            # per-order timeline (admin inline)
+            models.Index(fields=["order", "-changed_at"], name="status_hist_order_idx"),
+            # global history list
+            models.Index(fields=["-changed_at"], name="status_hist_recent_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_id}: {self.old_status} → {self.new_status}"
 
 
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key header ka stored result (orders/idempotency.py).
+
+    Row request shuru hote hi banta hai (status_code null = in progress),
+    response aane pe fill hota hai; TTL ke baad prune_idempotency_keys
+    batches me delete karta hai.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    scope = models.CharField(max_length=50, help_text="Endpoint, e.g. checkout")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "scope", "key"], name="unique_idempotency_key"
+            ),
+        ]
+        indexes = [
+            # expired keys ki batch pruning
+            models.Index(fields=["created_at"], name="idempotency_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status_code or 'in progress'})"
+
+
 @receiver(post_save, sender=Order)
-def create_initial_status_history(sender, instance, created, **kwargs):
+def create_initial_status_history(sender, instance, created, raw=False, **kwargs):
     """
-    Jab naya order create ho to initial status history entry ban jaye.
+    Jab naya order create ho to initial status history entry ban jaye
+    (state machine ke through, orders/transitions.py).
     """
-    if created:
-        OrderStatusHistory.objects.create(
-            order=instance,
-            old_status=None,  # pehla status, koi old nahi
-            new_status=instance.status,  # "pending" usually
-            changed_by=None,  # system ne create kiya, user nahi
-        )
+    if created and not raw:
+        from .transitions import record_created
+
+        record_created([instance])
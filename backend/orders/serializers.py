@@ -1,11 +1,54 @@
+import csv
+import io
+
+from django.db import transaction
 from rest_framework import serializers
+
+from inventory.stock import reserve as reserve_stock
+from products.models import Product
 from .models import Order, OrderItem
 
 
+class PreloadedProductField(serializers.PrimaryKeyRelatedField):
+    """
+    Product pk field jo list serializer ke preload kiye products se resolve
+    hota hai (har item pe alag SELECT nahi). Unknown ids normal path se
+    validation error dete hain.
+    """
+
+    def preload(self, pks):
+        ids = set()
+        for pk in pks:
+            try:
+                ids.add(int(pk))
+            except (TypeError, ValueError):
+                pass
+        self._preloaded = self.get_queryset().in_bulk(ids)
+
+    def to_internal_value(self, data):
+        try:
+            return self._preloaded[int(data)]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # saare items ke products ek query me
+        if isinstance(data, list):
+            self.child.fields["product"].preload(
+                item.get("product") for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
+    product = PreloadedProductField(queryset=Product.objects.all())
+
     class Meta:
         model = OrderItem
         fields = ["id", "product", "quantity", "price"]
+        list_serializer_class = OrderItemListSerializer
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -19,6 +62,8 @@ class OrderSerializer(serializers.ModelSerializer):
             "created_at",
             "status",
             "total_amount",
+            "discount_amount",
+            "coupon_code",
             # ✅ shipping snapshot fields
             "shipping_full_name",
             "shipping_phone",
@@ -31,7 +76,10 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             "user",
+            "status",  # sirf state machine badalti hai (orders/transitions.py)
             "total_amount",
+            "discount_amount",
+            "coupon_code",
             "created_at",
             "shipping_full_name",
             "shipping_phone",
@@ -42,19 +90,92 @@ class OrderSerializer(serializers.ModelSerializer):
             "shipping_pincode",
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
+        """
+        Order + items + initial status history ek transaction me; items ek
+        bulk_create me aur total ek baar (Order.place), item count chahe jitna ho.
+        Tracked stock bhi isi transaction me reserve hota hai (checkout jaisa);
+        kam pade to OutOfStock aur poora order rollback.
+        """
         items_data = validated_data.pop("items", [])
         user = self.context["request"].user
-        order = Order.objects.create(user=user, **validated_data)
+        order = Order.place(user, items_data, **validated_data)
+        quantities = {}
+        for item in items_data:
+            product_id = item["product"].pk
+            quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+        reserve_stock(order, quantities)
+        return order
 
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
 
-        order.update_total()
-        return order
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    ?view=summary list rows: no nested items, `item_count` is annotated by
+    the view.
+    """
+
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ["id", "status", "total_amount", "item_count"]
 
 
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):  # ✅ NEW
     class Meta:
         model = Order
         fields = ["status"]
+
+
+def is_order_id(value):
+    # isdigit() akela "²" / "①" bhi maan leta hai, jinpe int() fail hota hai
+    return value.isascii() and value.isdigit()
+
+
+class OrderBulkStatusSerializer(serializers.Serializer):
+    """
+    Staff bulk transition: `status` + order ids, either as a JSON list
+    (`order_ids`) or an uploaded CSV (`file`, an "id" / "order_id" column or
+    just one id per line).
+    """
+
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+    file = serializers.FileField(required=False)
+
+    def validate_file(self, upload):
+        try:
+            text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+            rows = [row for row in csv.reader(text) if row and row[0].strip()]
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise serializers.ValidationError(f"Could not read CSV: {exc}")
+
+        column, first_line = 0, 1
+        if rows and not is_order_id(rows[0][0].strip()):
+            first_line = 2  # errors me file ki asli line number
+            header = [name.strip().lower() for name in rows.pop(0)]
+            for name in ("order_id", "id"):
+                if name in header:
+                    column = header.index(name)
+                    break
+            else:
+                raise serializers.ValidationError('CSV needs an "id" or "order_id" column.')
+
+        ids = []
+        for line_no, row in enumerate(rows, start=first_line):
+            value = row[column].strip() if column < len(row) else ""
+            if not is_order_id(value):
+                raise serializers.ValidationError(f"Row {line_no}: {value!r} is not an order id.")
+            ids.append(int(value))
+        if not ids:
+            raise serializers.ValidationError("CSV has no order ids.")
+        return ids
+
+    def validate(self, attrs):
+        if ("order_ids" in attrs) == ("file" in attrs):
+            raise serializers.ValidationError("Send either order_ids or a CSV file.")
+        attrs["order_ids"] = attrs.pop("file", None) or attrs["order_ids"]
+        return attrs
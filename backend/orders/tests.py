@@ -1,3 +1,503 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+import csv
+import io
+import json
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from addresses.models import Address
+from cart.models import Cart, CartItem
+from ecommerce.query_plans import QueryPlanAssertions
+from inventory.models import StockLevel, StockReservation
+from products.models import Product
+from .admin import export_orders_as_csv, mark_as_shipped
+from .exports import export_queryset, iter_export
+from .models import IdempotencyKey, Order, OrderStatusHistory
+from .transitions import IllegalTransition, transition
+from .views import OrderListCreateView
+
+User = get_user_model()
+
+
+class OrderQueryPlanTests(QueryPlanAssertions, TestCase):
+    def test_user_order_list(self):
+        queryset = Order.objects.filter(user_id=1).order_by("-created_at", "-id")
+        self.assertUsesIndex(queryset[:20], "order_user_recent_idx")
+
+    def test_admin_order_changelist(self):
+        self.assertUsesIndex(
+            Order.objects.order_by("-created_at", "-id")[:100], "order_recent_idx"
+        )
+
+    def test_status_history_timeline(self):
+        self.assertUsesIndex(
+            OrderStatusHistory.objects.filter(order_id=1), "status_hist_order_idx"
+        )
+        self.assertUsesIndex(
+            OrderStatusHistory.objects.all()[:100], "status_hist_recent_idx"
+        )
+
+    def test_order_summary_list(self):
+        self.assertUsesIndex(
+            OrderListCreateView.summary_queryset(Order.objects.filter(user_id=1))[:21],
+            "order_user_recent_idx",
+        )
+
+    def test_idempotency_key_pruning(self):
+        queryset = IdempotencyKey.objects.filter(created_at__lt=timezone.now())
+        self.assertUsesIndex(
+            queryset.order_by("created_at").values("id")[:1000], "idempotency_created_idx"
+        )
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(title="Lamp", price=Decimal("250.00"))
+        self.address = Address.objects.create(
+            user=self.user, full_name="Buyer", phone="9999999999", line1="Street 1",
+            city="Jaipur", state="RJ", pincode="302001",
+        )
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+
+    def checkout(self, key, address_id=None):
+        return self.client.post(
+            reverse("cart-checkout"),
+            {"address_id": address_id or self.address.id},
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_original_checkout(self):
+        first = self.checkout("abc-1")
+        retry = self.checkout("abc-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+        # naya key -> normal flow (cart ab khaali hai)
+        self.assertEqual(self.checkout("abc-2").status_code, 400)
+
+    def test_key_reused_with_different_body(self):
+        self.checkout("abc-1")
+        self.assertEqual(self.checkout("abc-1", address_id=999).status_code, 422)
+
+    def test_in_progress_key_conflicts(self):
+        first = self.checkout("abc-1")
+        IdempotencyKey.objects.update(status_code=None, response_body=None)
+        self.assertEqual(self.checkout("abc-1").status_code, 409)
+        self.assertEqual(first.status_code, 201)
+
+    def test_stale_in_progress_key_is_taken_over(self):
+        self.checkout("abc-1")
+        # response save hone se pehle crash
+        IdempotencyKey.objects.update(status_code=None, response_body=None)
+        self.assertEqual(self.checkout("abc-1").status_code, 409)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.checkout("abc-1", address_id=999).status_code, 422)
+        response = self.checkout("abc-1")
+        self.assertEqual(response.status_code, 400)  # view dobara chala (cart khaali)
+        self.assertNotIn("Idempotent-Replayed", response)
+
+        retry = self.checkout("abc-1")
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_retry_after_conflict_runs_again(self):
+        stock = StockLevel.objects.create(product=self.product, on_hand=1)
+        self.assertEqual(self.checkout("abc-1").status_code, 409)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        stock.on_hand = 5
+        stock.save()
+        response = self.checkout("abc-1")
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_runs_again(self):
+        self.checkout("abc-1")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        response = self.checkout("abc-1")
+        self.assertEqual(response.status_code, 400)  # cart empty - view chala, replay nahi
+        self.assertNotIn("Idempotent-Replayed", response)
+
+    def test_order_create_replay(self):
+        payload = {"items": [{"product": self.product.id, "quantity": 1, "price": "250.00"}]}
+        headers = {"Idempotency-Key": "order-1"}
+        first = self.client.post(reverse("order-list-create"), payload, format="json", headers=headers)
+        retry = self.client.post(reverse("order-list-create"), payload, format="json", headers=headers)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_prune_deletes_expired_keys_in_batches(self):
+        for key in ("a", "b", "c"):
+            self.checkout(key)
+        IdempotencyKey.objects.exclude(key="c").update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        call_command("prune_idempotency_keys", batch_size=1, stdout=io.StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["c"])
+
+
+class OrderListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.products = Product.objects.bulk_create(
+            [Product(title=f"P{i}", price=Decimal("10.00")) for i in range(3)]
+        )
+
+    def place(self, count, items=2):
+        for _ in range(count):
+            Order.place(
+                self.user,
+                [{"product": p, "quantity": 1, "price": p.price} for p in self.products[:items]],
+            )
+
+    def test_cursor_pages_newest_first(self):
+        self.place(5)
+        ids = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        first = self.client.get(reverse("order-list-create"), {"page_size": 3})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual([o["id"] for o in first.data["results"]], ids[:3])
+        self.assertEqual([o["id"] for o in second.data["results"]], ids[3:])
+        self.assertIsNone(second.data["next"])
+        self.assertEqual(len(first.data["results"][0]["items"]), 2)
+
+    def test_items_prefetched_in_one_query(self):
+        self.place(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse("order-list-create"))
+        self.place(15, items=3)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse("order-list-create"))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_summary_view(self):
+        self.place(1, items=3)
+        Order.objects.create(user=self.user)  # bina items ke
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("order-list-create"), {"view": "summary"})
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        rows = response.data["results"]
+        self.assertEqual(set(rows[0]), {"id", "status", "total_amount", "item_count"})
+        self.assertEqual([row["item_count"] for row in rows], [0, 3])
+
+
+class OrderCreateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.products = Product.objects.bulk_create(
+            [Product(title=f"P{i}", price=Decimal("10.00")) for i in range(50)]
+        )
+
+    def create(self, size):
+        payload = {
+            "items": [
+                {"product": p.id, "quantity": 2, "price": "10.00"} for p in self.products[:size]
+            ]
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("order-list-create"), payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_items(self):
+        response, small = self.create(1)
+        response, large = self.create(50)
+        self.assertEqual(small, large)
+
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(order.total_amount, Decimal("1000.00"))
+        self.assertEqual(order.items.count(), 50)
+        history = order.status_history.get()
+        self.assertEqual((history.old_status, history.new_status), (None, "pending"))
+
+    def test_unknown_product_is_rejected(self):
+        payload = {"items": [{"product": 999999, "quantity": 1, "price": "10.00"}]}
+        response = self.client.post(reverse("order-list-create"), payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("product", response.data["items"][0])
+        self.assertFalse(Order.objects.exists())
+
+    def test_tracked_stock_is_reserved_or_409(self):
+        product = self.products[0]
+        StockLevel.objects.create(product=product, on_hand=3)
+        payload = {"items": [{"product": product.id, "quantity": 2, "price": "10.00"}]}
+
+        self.assertEqual(
+            self.client.post(reverse("order-list-create"), payload, format="json").status_code, 201
+        )
+        response = self.client.post(reverse("order-list-create"), payload, format="json")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["product_ids"], [product.id])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(StockLevel.objects.get(product=product).on_hand, 1)
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+    def test_place_never_goes_below_zero(self):
+        order = Order.place(
+            self.user,
+            [{"product": self.products[0], "quantity": 1, "price": Decimal("10.00")}],
+            discount_amount=Decimal("25.00"),
+        )
+        self.assertEqual(order.total_amount, 0)
+        order.update_total()
+        self.assertEqual(order.total_amount, 0)
+
+
+class BulkStatusTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", password="pass12345", is_staff=True)
+        self.client.force_authenticate(self.staff)
+        customer = User.objects.create_user("buyer", password="pass12345")
+        self.orders = Order.objects.bulk_create([Order(user=customer) for _ in range(6)])
+
+    def statuses(self):
+        return dict(Order.objects.values_list("id", "status"))
+
+    def test_admin_action_query_count_is_flat(self):
+        request = RequestFactory().post("/")
+        request.user = self.staff
+        model_admin = site._registry[Order]
+
+        def ship(ids):
+            with CaptureQueriesContext(connection) as ctx:
+                mark_as_shipped(model_admin, request, Order.objects.filter(id__in=ids))
+            return len(ctx.captured_queries)
+
+        ids = [order.id for order in self.orders]
+        self.assertEqual(ship(ids[:1]), ship(ids[1:]))
+        self.assertEqual(set(self.statuses().values()), {"shipped"})
+        self.assertEqual(OrderStatusHistory.objects.filter(new_status="shipped").count(), 6)
+
+        ship(ids)  # sab pehle se shipped - no new history
+        self.assertEqual(OrderStatusHistory.objects.filter(new_status="shipped").count(), 6)
+
+    def test_api_with_id_list(self):
+        ids = [order.id for order in self.orders[:4]]
+        Order.objects.filter(id__in=ids[:3]).update(status="shipped")
+        Order.objects.filter(id=ids[0]).update(status="delivered")
+
+        response = self.client.post(
+            reverse("order-bulk-status"),
+            {"status": "delivered", "order_ids": ids + [999999]},
+            format="json",
+        )
+
+        self.assertEqual(
+            response.data,
+            {
+                "status": "delivered",
+                "requested": 5,
+                "updated": 2,
+                "rejected": [{"id": ids[3], "status": "pending"}],
+            },
+        )
+        history = OrderStatusHistory.objects.filter(new_status="delivered")
+        self.assertEqual(
+            sorted(history.values_list("order_id", "old_status", "changed_by")),
+            [(ids[1], "shipped", self.staff.id), (ids[2], "shipped", self.staff.id)],
+        )
+
+    def test_api_with_csv_upload(self):
+        body = "order_id,note\n" + "".join(f"{order.id},x\n" for order in self.orders[:4])
+        upload = SimpleUploadedFile("orders.csv", body.encode(), content_type="text/csv")
+
+        response = self.client.post(
+            reverse("order-bulk-status"), {"status": "cancelled", "file": upload}
+        )
+
+        self.assertEqual(response.data["updated"], 4)
+        self.assertEqual(list(self.statuses().values()).count("cancelled"), 4)
+
+    def test_api_validation(self):
+        url = reverse("order-bulk-status")
+        self.assertEqual(self.client.post(url, {"status": "shipped"}, format="json").status_code, 400)
+        bad_csv = SimpleUploadedFile("orders.csv", b"id\nabc\n", content_type="text/csv")
+        self.assertEqual(
+            self.client.post(url, {"status": "shipped", "file": bad_csv}).status_code, 400
+        )
+
+        for content, line in ((b"id\n1\n\xc2\xb2\n", 3), ("1\n①\n".encode(), 2)):
+            upload = SimpleUploadedFile("orders.csv", content, content_type="text/csv")
+            response = self.client.post(url, {"status": "shipped", "file": upload})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(f"Row {line}:", str(response.data["file"]))
+
+        self.client.force_authenticate(User.objects.get(username="buyer"))
+        response = self.client.post(url, {"status": "shipped", "order_ids": [1]}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class OrderStateMachineTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", password="pass12345", is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.customer = User.objects.create_user("buyer", password="pass12345")
+        self.order = Order.objects.create(user=self.customer)
+
+    def set_status(self, status):
+        return self.client.patch(
+            reverse("order-status-update", args=[self.order.id]), {"status": status}
+        )
+
+    def test_status_view_writes_history(self):
+        self.assertEqual(self.set_status("shipped").data["status"], "shipped")
+        self.assertEqual(self.set_status("delivered").status_code, 200)
+        self.assertEqual(
+            list(self.order.status_history.order_by("id").values_list("old_status", "new_status")),
+            [(None, "pending"), ("pending", "shipped"), ("shipped", "delivered")],
+        )
+
+    def test_patch_without_status_changes_nothing(self):
+        response = self.client.patch(reverse("order-status-update", args=[self.order.id]), {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertEqual(self.order.status_history.count(), 1)
+
+    def test_illegal_jump_is_rejected(self):
+        self.set_status("shipped")
+        self.set_status("delivered")
+        response = self.set_status("pending")
+        self.assertEqual(response.status_code, 400)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "delivered")
+        with self.assertRaises(IllegalTransition):
+            transition(self.order, "cancelled", strict=True)
+
+    def test_single_and_bulk_use_same_query_count(self):
+        Order.objects.bulk_create([Order(user=self.customer) for _ in range(40)])
+
+        with CaptureQueriesContext(connection) as single:
+            transition(self.order, "processing")
+        with CaptureQueriesContext(connection) as bulk:
+            result = transition(Order.objects.filter(status="pending"), "processing")
+
+        self.assertEqual(len(result.changed), 40)
+        self.assertEqual(len(single.captured_queries), len(bulk.captured_queries))
+
+    def test_admin_change_form_cannot_edit_status(self):
+        admin = User.objects.create_superuser("root", password="pass12345")
+        self.client.force_login(admin)
+        request = RequestFactory().get("/")
+        request.user = admin
+
+        form = site._registry[Order].get_form(request, self.order)
+        self.assertNotIn("status", form.base_fields)  # POST me status aaye to bhi ignore
+        response = self.client.get(reverse("admin:orders_order_change", args=[self.order.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'name="status"')
+
+    def test_create_ignores_client_status(self):
+        product = Product.objects.create(title="Lamp", price=Decimal("10.00"))
+        self.client.force_authenticate(self.customer)
+        payload = {
+            "status": "delivered",
+            "items": [{"product": product.id, "quantity": 1, "price": "10.00"}],
+        }
+        response = self.client.post(reverse("order-list-create"), payload, format="json")
+        self.assertEqual(response.data["status"], "pending")
+
+
+class OrderExportTests(APITestCase):
+    url = reverse("order-export")
+
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", password="pass12345", is_staff=True)
+        self.customer = User.objects.create_user("buyer", email="b@example.com", password="pass12345")
+        self.lamp = Product.objects.create(title="Lamp", price=Decimal("250.00"))
+        self.mug = Product.objects.create(title="Mug", price=Decimal("99.00"))
+        self.order = Order.place(
+            self.customer,
+            [
+                {"product": self.lamp, "quantity": 2, "price": self.lamp.price},
+                {"product": self.mug, "quantity": 1, "price": self.mug.price},
+            ],
+            shipping_full_name="Buyer",
+            shipping_city="Jaipur",
+        )
+        self.empty = Order.objects.create(user=self.customer)
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_jsonl_has_items_and_shipping(self):
+        self.client.force_authenticate(self.staff)
+        rows = [json.loads(line) for line in self.body(self.client.get(self.url)).splitlines()]
+
+        self.assertEqual([row["id"] for row in rows], [self.order.id, self.empty.id])
+        self.assertEqual(rows[0]["shipping_city"], "Jaipur")
+        self.assertEqual(rows[0]["email"], "b@example.com")
+        self.assertEqual(
+            rows[0]["items"],
+            [
+                {"product_id": self.lamp.id, "product_title": "Lamp", "quantity": 2, "price": "250.00"},
+                {"product_id": self.mug.id, "product_title": "Mug", "quantity": 1, "price": "99.00"},
+            ],
+        )
+        self.assertEqual(rows[1]["items"], [])
+
+    def test_csv_row_per_item_with_filters(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url, {"fmt": "csv", "status": "pending"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(self.body(response))))
+        self.assertEqual(
+            [(row["id"], row["product_title"]) for row in rows],
+            [(str(self.order.id), "Lamp"), (str(self.order.id), "Mug"), (str(self.empty.id), "")],
+        )
+
+        tomorrow = (timezone.now() + timedelta(days=1)).date().isoformat()
+        response = self.client.get(self.url, {"fmt": "csv", "created_from": tomorrow})
+        self.assertEqual(len(self.body(response).splitlines()), 1)  # sirf header
+        self.assertEqual(self.client.get(self.url, {"created_to": "soon"}).status_code, 400)
+
+    def test_items_fetched_once_per_chunk(self):
+        Order.objects.bulk_create([Order(user=self.customer) for _ in range(5)])
+        with CaptureQueriesContext(connection) as ctx:
+            lines = list(iter_export("jsonl", export_queryset(), chunk_size=3))
+        # 7 orders / 3 per chunk -> 3 chunks: orders query + 3 item queries
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+    def test_admin_action_streams(self):
+        request = RequestFactory().post("/")
+        request.user = self.staff
+        response = export_orders_as_csv(site._registry[Order], request, Order.objects.all())
+        self.assertTrue(response.streaming)
+        self.assertIn("Lamp", self.body(response))
+
+    def test_management_command(self):
+        out = io.StringIO()
+        call_command("export_orders", "--format", "jsonl", "--status", "pending", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
@@ -0,0 +1,143 @@
+"""
+Order status state machine. Every status change goes through here: order
+creation (post_save receiver), OrderStatusUpdateView, the staff bulk API
+(POST /api/orders/bulk-status/) and the admin actions.
+
+    pending    -> processing, shipped, cancelled
+    processing -> shipped, cancelled
+    shipped    -> delivered
+    delivered, cancelled: final
+
+transition() moves one order or thousands to a target status in ONE
+transaction with a fixed number of queries:
+
+- one SELECT of (id, current status) for the orders not already there
+- one UPDATE ... WHERE status IN (statuses allowed to move to the target)
+- one bulk INSERT of OrderStatusHistory rows
+- entering "cancelled" also runs the set-based stock release (3 queries)
+
+Orders whose current status may not move to the target are left alone and
+reported in `rejected`; with strict=True they abort the whole call instead.
+SQLite transactions here are IMMEDIATE (settings.DATABASES), so the write
+lock is taken at BEGIN and the statuses read are exactly the ones the
+UPDATE overwrites.
+"""
+from django.db import transaction
+
+from inventory.stock import release as release_stock
+from .models import Order, OrderStatusHistory
+
+INITIAL_STATUS = "pending"
+
+TRANSITIONS = {
+    "pending": {"processing", "shipped", "cancelled"},
+    "processing": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
+# ids per `pk__in` query from the bulk API, well under SQLite's variable limit
+ID_CHUNK_SIZE = 5000
+
+
+class IllegalTransition(Exception):
+    def __init__(self, target, rejected):
+        self.target = target
+        self.rejected = rejected  # {order_id: current status}
+        details = ", ".join(f"#{pk} ({status})" for pk, status in sorted(rejected.items()))
+        super().__init__(f"Cannot move to {target}: {details}")
+
+
+class TransitionResult:
+    __slots__ = ("changed", "rejected")
+
+    def __init__(self, changed=None, rejected=None):
+        self.changed = changed or []  # order ids that moved
+        self.rejected = rejected or {}  # {order_id: current status}
+
+
+def can_transition(current, target):
+    return target in TRANSITIONS.get(current, ())
+
+
+def sources(target):
+    """
+    Statuses jinse `target` me ja sakte hain.
+    """
+    return [status for status, targets in TRANSITIONS.items() if target in targets]
+
+
+def record_history(rows, changed_by=None):
+    """
+    rows: (order_id, old_status, new_status) - ek bulk INSERT.
+    """
+    OrderStatusHistory.objects.bulk_create(
+        [
+            OrderStatusHistory(
+                order_id=order_id, old_status=old, new_status=new, changed_by=changed_by
+            )
+            for order_id, old, new in rows
+        ]
+    )
+
+
+def record_created(orders):
+    """
+    Naye orders ki initial history entry (old_status None), ek INSERT me.
+    """
+    record_history([(order.pk, None, order.status) for order in orders])
+
+
+def on_enter(target, order_ids):
+    if target == "cancelled":
+        # reserved stock wapas - saare orders ke liye ek saath
+        release_stock(order_ids)
+
+
+@transaction.atomic
+def transition(orders, target, changed_by=None, strict=False):
+    """
+    Move `orders` (an Order, or an Order queryset) to `target`.
+    Orders already in `target` are skipped without history.
+    Returns a TransitionResult; strict=True raises IllegalTransition instead
+    of skipping orders that may not move.
+    """
+    if target not in TRANSITIONS:
+        raise ValueError(f"Unknown order status {target!r}")
+    if isinstance(orders, Order):
+        orders = Order.objects.filter(pk=orders.pk)
+
+    pending = orders.exclude(status=target).order_by()
+    current = list(pending.values_list("id", "status"))
+    if not current:
+        return TransitionResult()
+
+    rejected = {pk: status for pk, status in current if not can_transition(status, target)}
+    if rejected and strict:
+        raise IllegalTransition(target, rejected)
+    moving = [(pk, status) for pk, status in current if pk not in rejected]
+    if not moving:
+        return TransitionResult(rejected=rejected)
+
+    pending.filter(status__in=sources(target)).update(status=target)
+    record_history([(pk, status, target) for pk, status in moving], changed_by)
+    changed = [pk for pk, _ in moving]
+    on_enter(target, changed)
+    return TransitionResult(changed, rejected)
+
+
+@transaction.atomic
+def transition_ids(order_ids, target, changed_by=None):
+    """
+    Id list (staff API / CSV) ke liye: ID_CHUNK_SIZE ke chunks, sab ek hi
+    transaction me. Unknown ids are ignored.
+    """
+    order_ids = sorted(set(order_ids))
+    result = TransitionResult()
+    for start in range(0, len(order_ids), ID_CHUNK_SIZE):
+        chunk = order_ids[start:start + ID_CHUNK_SIZE]
+        part = transition(Order.objects.filter(pk__in=chunk), target, changed_by)
+        result.changed += part.changed
+        result.rejected.update(part.rejected)
+    return result
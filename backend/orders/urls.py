@@ -3,11 +3,15 @@ from .views import (
     OrderListCreateView,
     OrderDetailView,
     OrderStatusUpdateView,  # ✅ status change
+    OrderBulkStatusView,    # staff bulk status change
+    OrderExportView,        # staff streaming export
     OrderInvoiceView,       # ✅ user invoice
 )
 
 urlpatterns = [
     path("", OrderListCreateView.as_view(), name="order-list-create"),           # list + create orders
+    path("bulk-status/", OrderBulkStatusView.as_view(), name="order-bulk-status"),  # staff bulk transition
+    path("export/", OrderExportView.as_view(), name="order-export"),              # staff export (csv/jsonl)
     path("<int:pk>/", OrderDetailView.as_view(), name="order-detail"),           # single order detail
     path("<int:pk>/status/", OrderStatusUpdateView.as_view(), name="order-status-update"),  # status change
     path("<int:pk>/invoice/", OrderInvoiceView.as_view(), name="order-invoice"),            # user invoice
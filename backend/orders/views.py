@@ -1,19 +1,86 @@
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 
+from ecommerce.exports import CONTENT_TYPES, streaming_response
+from ecommerce.pagination import KeysetCursorPagination
+from inventory.stock import OutOfStock
+from .exports import export_queryset, iter_export, parse_bound
+from .idempotency import run_idempotent
 from .models import Order, OrderItem, OrderStatusHistory
-from .serializers import OrderSerializer, OrderStatusUpdateSerializer
+from .serializers import (
+    OrderBulkStatusSerializer,
+    OrderSerializer,
+    OrderStatusUpdateSerializer,
+    OrderSummarySerializer,
+)
+from .transitions import IllegalTransition, transition, transition_ids
 from cart.models import Cart, CartItem  # tumhara cart app
 
 
 class OrderListCreateView(generics.ListCreateAPIView):
+    """
+    GET  /api/orders/?cursor=...&page_size=20            -> orders with items
+    GET  /api/orders/?view=summary                       -> id, status, total, item_count
+    POST /api/orders/                                    -> 409 if tracked stock is short
+
+    Keyset-paginated on (created_at, id) newest first (order_user_recent_idx),
+    so page 100 costs the same as page 1. Full rows get all the page's items
+    in one prefetch query; summary rows count items in a correlated subquery
+    and load no nested rows.
+    """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+
+    def is_summary(self):
+        return self.request.method == "GET" and self.request.query_params.get("view") == "summary"
+
+    def get_serializer_class(self):
+        return OrderSummarySerializer if self.is_summary() else OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by("-created_at")
+        queryset = Order.objects.filter(user=self.request.user)
+        if self.is_summary():
+            return self.summary_queryset(queryset)
+        return queryset.order_by("-created_at", "-id").prefetch_related(
+            Prefetch("items", queryset=OrderItem.objects.order_by("id"))
+        )
+
+    @staticmethod
+    def summary_queryset(queryset):
+        item_count = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .order_by()
+            .values("order")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return (
+            queryset.order_by("-created_at", "-id")
+            .only("id", "status", "total_amount", "created_at")
+            .annotate(item_count=Coalesce(Subquery(item_count), 0))
+        )
+
+    def post(self, request, *args, **kwargs):
+        # Idempotency-Key header: retry pe duplicate order nahi, stored response
+        create = super().post
+        return run_idempotent(request, "order-create", lambda: create(request, *args, **kwargs))
+
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except OutOfStock as exc:
+            # serializer ka transaction rollback ho chuka - order nahi bana
+            return Response(
+                {"detail": "Insufficient stock", "product_ids": exc.product_ids},
+                status=status.HTTP_409_CONFLICT,
+            )
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -31,10 +98,101 @@ class OrderDetailView(generics.RetrieveAPIView):
 
 
 class OrderStatusUpdateView(generics.UpdateAPIView):  # ✅ NEW
+    """
+    PUT/PATCH /api/orders/<id>/status/  {"status": "shipped"}   (staff only)
+
+    State machine ke through (orders/transitions.py): history row likhi jaati
+    hai, illegal jump (e.g. delivered -> pending) pe 400.
+    """
     queryset = Order.objects.all()
     serializer_class = OrderStatusUpdateSerializer
     permission_classes = [permissions.IsAdminUser]
-    # OPTIONAL: yahi pe history create kar sakte ho agar chaho.
+
+    def perform_update(self, serializer):
+        order = serializer.instance
+        target = serializer.validated_data.get("status")
+        if target is None:
+            return  # PATCH bina status - kuch badalna nahi
+        try:
+            transition(order, target, self.request.user, strict=True)
+        except IllegalTransition as exc:
+            raise ValidationError({"status": [str(exc)]})
+        order.refresh_from_db(fields=["status"])
+
+
+class OrderBulkStatusView(generics.GenericAPIView):
+    """
+    POST /api/orders/bulk-status/   (staff only)
+        {"status": "shipped", "order_ids": [1, 2, ...]}
+        or multipart: status=shipped, file=<CSV of order ids>
+
+    Saare orders ek transaction me, state machine ke through
+    (orders/transitions.py): ek UPDATE per id chunk + ek history bulk insert,
+    chahe 20k orders hon. Orders already in that status are left alone;
+    orders that may not move there come back in "rejected".
+    """
+
+    serializer_class = OrderBulkStatusSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_ids = serializer.validated_data["order_ids"]
+        new_status = serializer.validated_data["status"]
+        result = transition_ids(order_ids, new_status, changed_by=request.user)
+        return Response(
+            {
+                "status": new_status,
+                "requested": len(set(order_ids)),
+                "updated": len(result.changed),
+                "rejected": [
+                    {"id": order_id, "status": current}
+                    for order_id, current in sorted(result.rejected.items())
+                ],
+            }
+        )
+
+
+class OrderExportView(APIView):
+    """
+    GET /api/orders/export/?fmt=jsonl|csv&created_from=<iso>&created_to=<iso>&status=shipped
+
+    Staff-only streaming dump of orders with line items and the shipping
+    snapshot, oldest first (orders/exports.py). created_from is inclusive,
+    created_to exclusive; both take a date or a datetime.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        fmt = request.query_params.get("fmt", "jsonl")
+        if fmt not in CONTENT_TYPES:
+            return Response(
+                {"detail": "fmt must be one of: " + ", ".join(CONTENT_TYPES)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        bounds = {}
+        for name in ("created_from", "created_to"):
+            raw = request.query_params.get(name)
+            if raw:
+                try:
+                    bounds[name] = parse_bound(raw)
+                except ValueError:
+                    return Response(
+                        {"detail": f"{name} must be an ISO 8601 date or datetime"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+        order_status = request.query_params.get("status")
+        if order_status and order_status not in dict(Order.STATUS_CHOICES):
+            return Response(
+                {"detail": "Unknown status"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = export_queryset(status=order_status, **bounds)
+        return streaming_response(iter_export(fmt, queryset), fmt, "orders")
 
 
 class OrderInvoiceView(generics.GenericAPIView):
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Product
+from .filters import PRICE_BUCKETS, RATING_BUCKETS, bucket_q
+from .models import Product, Review
+from . import search
 
 
 class RatingFilter(admin.SimpleListFilter):
@@ -7,21 +9,11 @@ class RatingFilter(admin.SimpleListFilter):
     parameter_name = "rating_bucket"
 
     def lookups(self, request, model_admin):
-        return [
-            ("4_plus", "⭐ 4.0 and above"),
-            ("3_4", "⭐ 3.0 – 3.9"),
-            ("below_3", "⭐ below 3.0"),
-        ]
+        return [(key, label) for key, label, _, _ in RATING_BUCKETS]
 
     def queryset(self, request, queryset):
-        value = self.value()
-        if value == "4_plus":
-            return queryset.filter(rating__gte=4)
-        if value == "3_4":
-            return queryset.filter(rating__gte=3, rating__lt=4)
-        if value == "below_3":
-            return queryset.filter(rating__lt=3)
-        return queryset
+        q = bucket_q("rating", RATING_BUCKETS, self.value())
+        return queryset if q is None else queryset.filter(q)
 
 
 class PriceFilter(admin.SimpleListFilter):
@@ -29,30 +21,18 @@ class PriceFilter(admin.SimpleListFilter):
     parameter_name = "price_bucket"
 
     def lookups(self, request, model_admin):
-        return [
-            ("lt_500", "₹0 – ₹499"),
-            ("500_1999", "₹500 – ₹1,999"),
-            ("2000_4999", "₹2,000 – ₹4,999"),
-            ("gte_5000", "₹5,000+"),
-        ]
+        return [(key, label) for key, label, _, _ in PRICE_BUCKETS]
 
     def queryset(self, request, queryset):
-        value = self.value()
-        if value == "lt_500":
-            return queryset.filter(price__lt=500)
-        if value == "500_1999":
-            return queryset.filter(price__gte=500, price__lt=2000)
-        if value == "2000_4999":
-            return queryset.filter(price__gte=2000, price__lt=5000)
-        if value == "gte_5000":
-            return queryset.filter(price__gte=5000)
-        return queryset
+        q = bucket_q("price", PRICE_BUCKETS, self.value())
+        return queryset if q is None else queryset.filter(q)
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = (
         "id",
+        "sku",
         "title",
         "price",
         "rating",
@@ -61,7 +41,7 @@ class ProductAdmin(admin.ModelAdmin):
     )
     list_display_links = ("id", "title")
     search_fields = ("title",)
-    search_help_text = "Search by product title"  # chhota hint text
+    search_help_text = "Search by product title or description"  # chhota hint text
     list_filter = (
         "created_at",
         RatingFilter,
@@ -69,3 +49,20 @@ class ProductAdmin(admin.ModelAdmin):
     )
     ordering = ("-created_at",)
     list_per_page = 25
+
+    def get_search_results(self, request, queryset, search_term):
+        # LIKE scan ki jagah FTS5 index se match karo
+        if search_term and search.is_available():
+            if not search.build_match_expression(search_term):
+                return queryset.none(), False
+            return queryset.filter(pk__in=search.matching_ids(search_term)), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ("id", "product", "user", "rating", "created_at")
+    list_filter = ("rating", "created_at")
+    search_fields = ("product__title", "user__username")
+    raw_id_fields = ("product", "user")
+    ordering = ("-created_at",)
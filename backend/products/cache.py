@@ -0,0 +1,119 @@
+"""
+Read-through cache for the anonymous product catalog.
+
+Keys look like `catalog:<version>:<view>:<hash of host, path and sorted query
+params>`. The version counter is bumped whenever a Product is saved or
+deleted, which orphans every cached page at once; stale entries then just
+expire. A miss is rebuilt by a single caller (cache.add() lock) while
+concurrent callers poll for the result instead of all hitting SQLite.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from ecommerce import versioning
+
+VERSION_KEY = "catalog:version"
+POLL_INTERVAL = 0.05
+
+
+def get_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+def get_lock_timeout():
+    return getattr(settings, "CATALOG_CACHE_LOCK_TIMEOUT", 10)
+
+
+def get_version():
+    return versioning.get_version(get_cache(), VERSION_KEY)
+
+
+def invalidate_catalog():
+    versioning.invalidate(get_cache(), VERSION_KEY)
+
+
+def make_key(view_name, request):
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    digest = hashlib.md5(
+        repr((request.get_host(), request.path, params)).encode("utf-8")
+    ).hexdigest()
+    return f"catalog:{get_version()}:{view_name}:{digest}"
+
+
+def get_or_build(key, build):
+    """
+    Returns the cached value for `key`, or calls `build()` to produce it.
+
+    Only the caller that wins the lock runs `build()`; the rest wait for its
+    result (up to the lock timeout) and fall back to building themselves only
+    if it never shows up. `build()` returning None means "don't cache".
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    lock_timeout = get_lock_timeout()
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            value = build()
+            if value is not None:
+                cache.set(key, value, timeout=get_timeout())
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return build()
+
+
+class CatalogCacheMixin:
+    """
+    Serves GET for anonymous users from the catalog cache. Authenticated
+    responses carry per-user fields (is_in_wishlist) and always go to the view.
+    """
+
+    cache_view_name = None
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        built = {}
+
+        def build():
+            response = super(CatalogCacheMixin, self).get(request, *args, **kwargs)
+            built["response"] = response
+            return response.data if response.status_code == 200 else None
+
+        key = make_key(self.cache_view_name or type(self).__name__, request)
+        data = get_or_build(key, build)
+
+        if "response" in built:
+            response = built["response"]
+            response["X-Cache"] = "MISS"
+            return response
+
+        response = Response(data)
+        response["X-Cache"] = "HIT"
+        return response
@@ -0,0 +1,56 @@
+"""
+Streaming catalog export (JSONL / CSV), shared by the staff API endpoint and
+`manage.py export_products`.
+
+Rows are read with values_list().iterator(chunk_size=...) in (updated_at, id)
+order and encoded one chunk at a time (ecommerce/exports.py), so memory stays
+bounded by the chunk size and the first bytes go out as soon as the first
+chunk is fetched.
+"""
+from django.db.models import Q
+
+from ecommerce.exports import CHUNK_SIZE, chunks, iter_csv, iter_jsonl, jsonable
+from .models import Product
+
+EXPORT_FIELDS = (
+    "id",
+    "sku",
+    "title",
+    "description",
+    "price",
+    "image",
+    "rating",
+    "num_reviews",
+    "created_at",
+    "updated_at",
+)
+
+def export_queryset(updated_since=None, after_id=None):
+    """
+    Products changed at/after `updated_since`, oldest change first.
+
+    Incremental pulls pass the updated_at and id of the last row they got:
+    with `after_id` the cursor is exclusive on (updated_at, id); without it
+    the timestamp is inclusive, so a row is never missed (at worst repeated).
+    """
+    queryset = Product.objects.order_by("updated_at", "id")
+    if updated_since is not None:
+        if after_id is not None:
+            queryset = queryset.filter(
+                Q(updated_at__gt=updated_since)
+                | Q(updated_at=updated_since, id__gt=after_id)
+            )
+        else:
+            queryset = queryset.filter(updated_at__gte=updated_since)
+    return queryset.values_list(*EXPORT_FIELDS)
+
+
+def _as_dict(row):
+    return dict(zip(EXPORT_FIELDS, map(jsonable, row)))
+
+
+def iter_export(fmt, queryset, chunk_size=CHUNK_SIZE):
+    chunked = chunks(queryset.iterator(chunk_size=chunk_size), chunk_size)
+    if fmt == "csv":
+        return iter_csv(chunked, EXPORT_FIELDS, lambda row: (row,))
+    return iter_jsonl(chunked, _as_dict)
@@ -0,0 +1,113 @@
+from django.db.models import Count, Q
+from rest_framework import serializers
+
+# (key, label, low, high) -> low <= value < high; None = open end.
+# Admin list filters aur public facets dono yahi buckets use karte hain.
+PRICE_BUCKETS = (
+    ("lt_500", "₹0 – ₹499", None, 500),
+    ("500_1999", "₹500 – ₹1,999", 500, 2000),
+    ("2000_4999", "₹2,000 – ₹4,999", 2000, 5000),
+    ("gte_5000", "₹5,000+", 5000, None),
+)
+
+RATING_BUCKETS = (
+    ("4_plus", "⭐ 4.0 and above", 4, None),
+    ("3_4", "⭐ 3.0 – 3.9", 3, 4),
+    ("below_3", "⭐ below 3.0", None, 3),
+)
+
+SORT_OPTIONS = {
+    "newest": ("-created_at", "-id"),
+    "price_asc": ("price", "id"),
+    "price_desc": ("-price", "-id"),
+    "rating": ("-rating", "-id"),
+}
+
+
+def range_q(field, low=None, high=None):
+    q = Q()
+    if low is not None:
+        q &= Q(**{f"{field}__gte": low})
+    if high is not None:
+        q &= Q(**{f"{field}__lt": high})
+    return q
+
+
+def bucket_q(field, buckets, key):
+    for bucket_key, _, low, high in buckets:
+        if bucket_key == key:
+            return range_q(field, low, high)
+    return None
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """
+    Query params for GET /api/products/:
+    ?min_price=500&max_price=2000&min_rating=4&sort=price_asc
+    """
+
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    min_rating = serializers.FloatField(min_value=0, max_value=5, required=False)
+    sort = serializers.ChoiceField(
+        choices=list(SORT_OPTIONS), default="newest", required=False
+    )
+
+    def validate(self, attrs):
+        low, high = attrs.get("min_price"), attrs.get("max_price")
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError(
+                {"max_price": "max_price must be greater than or equal to min_price"}
+            )
+        return attrs
+
+    def price_q(self):
+        data = self.validated_data
+        q = range_q("price", data.get("min_price"))
+        if data.get("max_price") is not None:
+            q &= Q(price__lte=data["max_price"])
+        return q
+
+    def rating_q(self):
+        return range_q("rating", self.validated_data.get("min_rating"))
+
+    def get_ordering(self):
+        return SORT_OPTIONS[self.validated_data.get("sort") or "newest"]
+
+
+def facet_counts(queryset, price_q=Q(), rating_q=Q()):
+    """
+    Per-bucket counts for the price and rating facets in ONE aggregate query.
+
+    Each facet is counted with the *other* facet's filter applied (standard
+    drill-down behaviour), so every bucket reads "how many results would I
+    get if I picked this".
+    """
+    aggregates = {}
+    for key, _, low, high in PRICE_BUCKETS:
+        aggregates[f"price_{key}"] = Count("pk", filter=range_q("price", low, high) & rating_q)
+    for key, _, low, high in RATING_BUCKETS:
+        aggregates[f"rating_{key}"] = Count("pk", filter=range_q("rating", low, high) & price_q)
+
+    counts = queryset.aggregate(**aggregates)
+
+    def facet(name, buckets):
+        return [
+            {
+                "key": key,
+                "label": label,
+                "min": low,
+                "max": high,
+                "count": counts[f"{name}_{key}"],
+            }
+            for key, label, low, high in buckets
+        ]
+
+    return {
+        "price": facet("price", PRICE_BUCKETS),
+        "rating": facet("rating", RATING_BUCKETS),
+    }
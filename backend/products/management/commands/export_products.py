@@ -0,0 +1,34 @@
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ecommerce.exports import ExportCommand
+from products.exports import export_queryset, iter_export
+
+
+class Command(ExportCommand):
+    help = "Stream the product catalog as JSONL or CSV to stdout or a file."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--updated-since",
+            help="Only products changed at/after this ISO 8601 datetime",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            help="With --updated-since: skip rows at that exact timestamp up to this id",
+        )
+
+    def get_stream(self, fmt, chunk_size, options):
+        updated_since = None
+        if options["updated_since"]:
+            updated_since = parse_datetime(options["updated_since"])
+            if updated_since is None:
+                raise CommandError("--updated-since must be an ISO 8601 datetime")
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        queryset = export_queryset(updated_since, options["after_id"])
+        return iter_export(fmt, queryset, chunk_size)
@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products.cache import invalidate_catalog
+from products.models import Product
+from products.search import index_product_ids
+
+IMPORT_FIELDS = ("sku", "title", "description", "price", "image", "rating", "num_reviews")
+REQUIRED_FIELDS = ("sku", "title", "price")
+
+
+def read_csv(stream):
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, row
+
+
+def read_jsonl(stream):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, exc
+            continue
+        yield line_no, row
+
+
+def build_product(row):
+    """
+    Row dict -> (unsaved Product, provided field names), using the model
+    fields' own clean() so the import enforces what the admin form would.
+    """
+    if not isinstance(row, dict):
+        raise ValidationError("row must be an object")
+
+    values = {}
+    for name in IMPORT_FIELDS:
+        raw = row.get(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, ""):
+            if name in REQUIRED_FIELDS:
+                raise ValidationError({name: "This field is required."})
+            continue
+        field = Product._meta.get_field(name)
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as exc:
+            raise ValidationError({name: exc.messages})
+
+    if not 0 <= values.get("rating", 0) <= 5:
+        raise ValidationError({"rating": "Rating must be between 0 and 5."})
+    if values["price"] < 0:
+        raise ValidationError({"price": "Price cannot be negative."})
+    return Product(**values), frozenset(values)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products from a CSV or JSONL file and upsert them on SKU in "
+        "chunked transactions. Columns: " + ", ".join(IMPORT_FIELDS)
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: guessed from the file extension)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows per bulk upsert / transaction (default: 2000)",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=100,
+            help="Abort after this many invalid rows (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        if path == "-":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        else:
+            try:
+                stream = open(path, encoding="utf-8", newline="")
+            except OSError as exc:
+                raise CommandError(f"Cannot open {path}: {exc}")
+
+        reader = read_jsonl(stream) if fmt == "jsonl" else read_csv(stream)
+        self.errors = 0
+        self.max_errors = options["max_errors"]
+        imported = 0
+        started = time.monotonic()
+
+        try:
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+                imported += self.import_chunk(chunk)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{imported} rows upserted, {self.errors} skipped "
+                    f"({imported / elapsed if elapsed else 0:.0f} rows/s)"
+                )
+        finally:
+            if path != "-":
+                stream.close()
+            if imported:
+                invalidate_catalog()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} products in {elapsed:.2f}s "
+                f"({imported / elapsed if elapsed else 0:.0f} rows/s), "
+                f"{self.errors} invalid rows skipped"
+            )
+        )
+
+    def import_chunk(self, chunk):
+        by_sku = {}
+        for line_no, row in chunk:
+            try:
+                if isinstance(row, Exception):
+                    raise ValidationError(f"invalid JSON: {row}")
+                product, provided = build_product(row)
+            except ValidationError as exc:
+                self.report_error(line_no, exc)
+                continue
+            # same SKU twice in one chunk -> last row wins
+            by_sku[product.sku] = (product, provided)
+
+        # Upsert sirf wahi columns jo row me aaye the, taaki feed me missing
+        # rating/num_reviews existing values ko default se overwrite na kare.
+        groups = {}
+        for product, provided in by_sku.values():
+            groups.setdefault(provided, []).append(product)
+
+        upserted = 0
+        with transaction.atomic():
+            for provided, products in groups.items():
+                products = Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=["sku"],
+                    update_fields=sorted((provided - {"sku"}) | {"updated_at"}),
+                )
+                index_product_ids([product.pk for product in products])
+                upserted += len(products)
+        return upserted
+
+    def report_error(self, line_no, exc):
+        self.errors += 1
+        detail = getattr(exc, "message_dict", None) or exc.messages
+        self.stderr.write(f"line {line_no}: {detail}")
+        if self.errors >= self.max_errors:
+            raise CommandError(f"Aborting after {self.errors} invalid rows")
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 product search index from the products table."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} products in {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.cache import invalidate_catalog
+from products.models import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Product.rating and num_reviews from the reviews table for "
+        "the whole catalog in one set-based UPDATE."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            updated = recompute_ratings()
+        invalidate_catalog()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed ratings for {updated} products in {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(blank=True, help_text='Supplier stock-keeping unit; bulk imports upsert on this', max_length=64, null=True, unique=True, verbose_name='SKU'),
+        ),
+    ]
@@ -1,10 +1,35 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
 
 User = get_user_model()
 
 
 class Product(models.Model):
+    sku = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="SKU",
+        help_text="Supplier stock-keeping unit; bulk imports upsert on this",
+    )
     title = models.CharField(
         max_length=255,
         verbose_name="Product title",
@@ -40,6 +65,21 @@ class Product(models.Model):
         auto_now_add=True,
         verbose_name="Created at",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Updated at",
+        help_text="Last change; incremental catalog exports page on this",
+    )
+
+    class Meta:
+        indexes = [
+            # catalog default sort + keyset cursor (created_at, id)
+            models.Index(fields=["-created_at", "-id"], name="product_newest_idx"),
+            # price / rating filters and sorts
+            models.Index(fields=["price", "id"], name="product_price_idx"),
+            models.Index(fields=["-rating", "-id"], name="product_rating_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -70,3 +110,212 @@ class Wishlist(models.Model):
 
     def __str__(self):
         return f"Wishlist of {self.user.username}"
+
+
+class Review(models.Model):
+    """
+    Customer review. Product.rating / num_reviews are kept in step by the
+    receivers below with one F-expression UPDATE per write (no AVG scans).
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reviews",
+        verbose_name="Product",
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="reviews",
+        verbose_name="User",
+    )
+    rating = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        verbose_name="Rating",
+        help_text="Stars from 1 to 5",
+    )
+    comment = models.TextField(blank=True, verbose_name="Comment")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Review"
+        verbose_name_plural = "Reviews"
+        ordering = ["-created_at", "-id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "user"], name="unique_review_per_user"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["product", "-created_at", "-id"],
+                name="review_product_recent_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.rating}★ on {self.product_id} by {self.user_id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # purani rating yaad rakho, update pe sirf delta lagana hai
+        instance._stored_rating = instance.__dict__.get("rating")
+        return instance
+
+
+def _float(expression):
+    return ExpressionWrapper(expression, output_field=FloatField())
+
+
+def apply_review_added(product_id, stars):
+    Product.objects.filter(pk=product_id).update(
+        rating=_float(
+            (F("rating") * F("num_reviews") + Value(float(stars))) / (F("num_reviews") + 1)
+        ),
+        num_reviews=F("num_reviews") + 1,
+        updated_at=Now(),
+    )
+
+
+def apply_review_changed(product_id, old_stars, new_stars):
+    Product.objects.filter(pk=product_id, num_reviews__gt=0).update(
+        rating=_float(F("rating") + Value(float(new_stars - old_stars)) / F("num_reviews")),
+        updated_at=Now(),
+    )
+
+
+def apply_review_removed(product_id, stars):
+    Product.objects.filter(pk=product_id, num_reviews__gt=0).update(
+        rating=Case(
+            When(num_reviews=1, then=Value(0.0)),
+            default=_float(
+                (F("rating") * F("num_reviews") - Value(float(stars))) / (F("num_reviews") - 1)
+            ),
+            output_field=FloatField(),
+        ),
+        num_reviews=F("num_reviews") - 1,
+        updated_at=Now(),
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_stored_rating", None)
+    if created:
+        apply_review_added(instance.product_id, instance.rating)
+    elif old is not None and old != instance.rating:
+        apply_review_changed(instance.product_id, old, instance.rating)
+    else:
+        return
+    instance._stored_rating = instance.rating
+    from .cache import invalidate_catalog
+
+    invalidate_catalog()
+
+
+def recompute_ratings(products=None):
+    """
+    rating / num_reviews seedha reviews table se, ek set-based UPDATE me
+    (`products`: Product queryset, default poora catalog). Returns rows updated.
+    """
+    per_product = Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    extra = {}
+    if products is None:
+        products = Product.objects.all()
+    else:
+        extra["updated_at"] = Now()  # chuninda products: incremental export me dikhe
+    return products.update(
+        num_reviews=Coalesce(
+            Subquery(per_product.annotate(c=Count("id")).values("c")),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+        rating=Coalesce(
+            Subquery(per_product.annotate(a=Avg("rating")).values("a")),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+        **extra,
+    )
+
+
+# Cascade deletes (Product / User) ke dauran per-review receiver skip hota hai:
+# product ke saath uske reviews ka aggregate bhi chala jaata hai, aur user ke
+# reviews ka hisaab post_delete pe ek set-based recompute me. Saari bookkeeping
+# delete ke `origin` (instance / queryset) pe rehti hai, module state me nahi -
+# delete fail ho to bhi baad ke review deletes pe koi purana marker nahi bachta.
+def _deleting(origin, model):
+    if origin is None:
+        return False
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return issubclass(origin_model, model)
+
+
+@receiver(pre_delete, sender=User)
+def defer_review_updates_for_deleted_user(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        return
+    if not hasattr(origin, "_review_rerate"):
+        origin._review_rerate = {"users": set(), "products": set()}
+    origin._review_rerate["users"].add(instance.pk)
+    origin._review_rerate["products"].update(
+        Review.objects.filter(user=instance).values_list("product_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=User)
+def recompute_ratings_after_user_delete(sender, instance, origin=None, **kwargs):
+    pending = getattr(origin, "_review_rerate", None)
+    if pending is None:
+        return
+    pending["users"].discard(instance.pk)
+    if pending["users"]:
+        return  # bulk user delete: aakhri user ke baad ek hi recompute
+    del origin._review_rerate
+    if pending["products"]:
+        recompute_ratings(Product.objects.filter(pk__in=pending["products"]))
+        from .cache import invalidate_catalog
+
+        invalidate_catalog()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, origin=None, **kwargs):
+    if _deleting(origin, Product) or _deleting(origin, User):
+        return
+    stars = getattr(instance, "_stored_rating", None) or instance.rating
+    apply_review_removed(instance.product_id, stars)
+    from .cache import invalidate_catalog
+
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, raw=False, **kwargs):
+    """
+    Product save hote hi FTS index me row upsert (same transaction).
+    """
+    if raw:
+        return
+    from .search import index_product
+
+    index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search(sender, instance, **kwargs):
+    from .search import remove_product
+
+    remove_product(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    from .cache import invalidate_catalog
+
+    invalidate_catalog()
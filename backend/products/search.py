@@ -0,0 +1,131 @@
+"""
+SQLite FTS5 full-text index over Product.title / Product.description.
+
+The virtual table is created by migration 0004 and keyed by rowid = product id.
+Rows are written from the Product post_save / post_delete receivers in
+models.py; `manage.py rebuild_search_index` repopulates it set-based after bulk
+writes that bypass signals.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "products_product_fts"
+
+# bm25() column weights: title match counts 10x a description match
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def index_product(product):
+    index_products([product])
+
+
+def index_products(products):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, description) "
+            "VALUES (%s, %s, %s)",
+            [(p.pk, p.title, p.description) for p in products],
+        )
+
+
+def index_product_ids(product_ids):
+    """
+    Re-index rows straight from the products table (INSERT..SELECT), for bulk
+    writes where the in-memory objects may not carry every column.
+    """
+    if not is_available() or not product_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, description) "
+            f"SELECT id, title, description FROM products_product WHERE id IN ({placeholders})",
+            list(product_ids),
+        )
+
+
+def remove_product(product_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index():
+    """
+    Drops every indexed row and re-inserts the catalog with one INSERT..SELECT,
+    then merges the FTS b-trees. Returns the number of indexed products
+    (0 on non-SQLite backends, where there is no FTS5 table).
+    """
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            "SELECT id, title, description FROM products_product"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def build_match_expression(query):
+    """
+    User text -> FTS5 MATCH expression. Every word becomes a quoted prefix term
+    (implicit AND), so operators / quotes typed by users can never produce an
+    FTS syntax error. Returns "" when nothing searchable is left.
+    """
+    tokens = _TOKEN_RE.findall(query or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def matching_ids(query):
+    """
+    Subquery of matching product ids, for `queryset.filter(pk__in=...)`.
+    """
+    return RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+        [build_match_expression(query)],
+    )
+
+
+def search_product_ids(query, limit, after=None):
+    """
+    BM25-ranked product ids for `query`, best match first.
+
+    Returns a list of (id, score) rows. Pages are keyset on (score, id): pass
+    the last row of one page as `after` to get the next.
+    """
+    expression = build_match_expression(query)
+    if not expression:
+        return []
+
+    sql = (
+        "SELECT id, score FROM ("
+        f"  SELECT rowid AS id, bm25({FTS_TABLE}, %s, %s) AS score"
+        f"  FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        ")"
+    )
+    params = [TITLE_WEIGHT, DESCRIPTION_WEIGHT, expression]
+    if after is not None:
+        last_id, score = after
+        sql += " WHERE score > %s OR (score = %s AND id > %s)"
+        params += [score, score, last_id]
+    sql += " ORDER BY score, id LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -1,8 +1,70 @@
 from rest_framework import serializers
-from .models import Product, Wishlist
+from .models import Product, Review, Wishlist
 
 
-class ProductSerializer(serializers.ModelSerializer):
+def get_wishlist_product_ids(request):
+    """
+    Current user ke wishlist product ids, ek query me load karke request pe
+    memoise kar dete hain - list, detail, cart aur wishlist ke nested
+    serializers sab yahi set share karte hain.
+    """
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+
+    product_ids = getattr(request, "_wishlist_product_ids", None)
+    if product_ids is None:
+        product_ids = frozenset(
+            Wishlist.products.through.objects.filter(
+                wishlist__user=request.user
+            ).values_list("product_id", flat=True)
+        )
+        request._wishlist_product_ids = product_ids
+    return product_ids
+
+
+def get_requested_fields(request):
+    """
+    ?fields=id,title,price -> {"id", "title", "price"}; None jab param na ho.
+    "id" hamesha include hota hai.
+    """
+    if request is None:
+        return None
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    return frozenset(name.strip() for name in raw.split(",") if name.strip()) | {"id"}
+
+
+class SparseFieldsMixin:
+    """
+    Drops every field not named in ?fields=. Works for nested serializers
+    too, because `fields` is built lazily once the root context is bound.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = get_requested_fields(self.context.get("request"))
+        if requested is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in requested}
+
+
+def product_columns(serializer_class, request=None, extra=()):
+    """
+    Concrete Product columns the serializer will read for this request, for
+    `queryset.only(...)`. `extra` adds columns needed elsewhere (ordering
+    keys used by the paginator).
+    """
+    concrete = {field.attname for field in Product._meta.concrete_fields}
+    serializer = serializer_class(context={"request": request})
+    columns = {"id", *extra}
+    columns.update(
+        field.source for field in serializer.fields.values() if field.source in concrete
+    )
+    return sorted(columns)
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     is_in_wishlist = serializers.SerializerMethodField()
 
     class Meta:
@@ -10,14 +72,26 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_is_in_wishlist(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            try:
-                wishlist = Wishlist.objects.get(user=request.user)
-                return obj in wishlist.products.all()
-            except Wishlist.DoesNotExist:
-                return False
-        return False
+        return obj.pk in get_wishlist_product_ids(self.context.get("request"))
+
+
+class ProductListSerializer(ProductSerializer):
+    """
+    Listing cards ke liye slim version - description nahi bhejte.
+    """
+
+    class Meta:
+        model = Product
+        fields = (
+            "id",
+            "title",
+            "price",
+            "image",
+            "rating",
+            "num_reviews",
+            "created_at",
+            "is_in_wishlist",
+        )
 
 
 class WishlistSerializer(serializers.ModelSerializer):
@@ -27,3 +101,21 @@ class WishlistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wishlist
         fields = ("id", "products", "created_at", "updated_at")
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    user = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ("id", "product", "user", "rating", "comment", "created_at", "updated_at")
+        read_only_fields = ("product", "created_at", "updated_at")
+
+    def validate(self, attrs):
+        request = self.context["request"]
+        product = self.context.get("product")
+        if self.instance is None and product is not None and Review.objects.filter(
+            product=product, user=request.user
+        ).exists():
+            raise serializers.ValidationError("You have already reviewed this product.")
+        return attrs
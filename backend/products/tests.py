@@ -1,3 +1,586 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import pre_delete
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from ecommerce.query_plans import QueryPlanAssertions
+from .admin import PriceFilter, RatingFilter
+from .filters import SORT_OPTIONS
+from .models import Product, Review, Wishlist
+from . import cache as catalog_cache, search
+
+User = get_user_model()
+
+
+def make_product(title="Product", price="100.00", rating=0, **extra):
+    return Product.objects.create(
+        title=title, price=Decimal(price), rating=rating, **extra
+    )
+
+
+class ProductCursorPaginationTests(APITestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(7):
+            p = make_product(title=f"P{i}", price=str(100 + i))
+            # do products same timestamp pe -> id tiebreaker check hota hai
+            Product.objects.filter(pk=p.pk).update(
+                created_at=now - timedelta(minutes=i // 2)
+            )
+        self.url = reverse("product-list")
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_pages_cover_catalog_once_in_order(self):
+        ids = self.walk(f"{self.url}?page_size=3")
+        expected = list(
+            Product.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_insert_between_pages_does_not_shift_results(self):
+        first = self.client.get(f"{self.url}?page_size=3").data
+        make_product(title="New arrival")
+        rest = self.walk(first["next"])
+        seen = [row["id"] for row in first["results"]] + rest
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 7)
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get(f"{self.url}?page_size=3").data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual(
+            [r["id"] for r in back["results"]],
+            [r["id"] for r in first["results"]],
+        )
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(f"{self.url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+
+class WishlistMembershipTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("shopper", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.wishlist = Wishlist.objects.create(user=self.user)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("product-list"))
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_membership_flags(self):
+        liked = make_product(title="Liked")
+        make_product(title="Other")
+        self.wishlist.products.add(liked)
+
+        response, _ = self.list_queries()
+        flags = {row["id"]: row["is_in_wishlist"] for row in response.data["results"]}
+        self.assertTrue(flags[liked.id])
+        self.assertEqual(sum(flags.values()), 1)
+
+    def test_query_count_independent_of_page_size(self):
+        for i in range(3):
+            self.wishlist.products.add(make_product(title=f"A{i}"))
+        _, small = self.list_queries()
+
+        for i in range(12):
+            self.wishlist.products.add(make_product(title=f"B{i}"))
+        _, large = self.list_queries()
+
+        self.assertEqual(small, large)
+
+
+class ProductSearchTests(APITestCase):
+    url = reverse("product-search")
+
+    def search_ids(self, q, **params):
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]], response.data
+
+    def test_title_match_ranks_above_description_match(self):
+        in_desc = make_product(title="USB cable", description="Works with any keyboard")
+        in_title = make_product(title="Mechanical keyboard")
+        make_product(title="Unrelated")
+
+        ids, _ = self.search_ids("keyboard")
+        self.assertEqual(ids, [in_title.id, in_desc.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        product = make_product(title="Blue kettle")
+        product.title = "Red kettle"
+        product.save()
+
+        self.assertEqual(self.search_ids("blue")[0], [])
+        self.assertEqual(self.search_ids("red")[0], [product.id])
+
+        product.delete()
+        self.assertEqual(self.search_ids("kettle")[0], [])
+
+    def test_prefix_terms_and_operator_characters(self):
+        product = make_product(title="Headphones")
+        self.assertEqual(self.search_ids('head" *(')[0], [product.id])
+
+    def test_pages_follow_next_cursor(self):
+        expected = {make_product(title=f"Lamp {i}").id for i in range(5)}
+        ids, data = self.search_ids("lamp", page_size=2)
+        while data["next"]:
+            data = self.client.get(data["next"]).data
+            ids += [row["id"] for row in data["results"]]
+        self.assertEqual(sorted(ids), sorted(expected))
+
+    def test_missing_query_is_400(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(self.url, {"q": "lamp", "cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_rebuild_is_noop_without_fts(self):
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            self.assertEqual(search.rebuild_index(), 0)
+
+    def test_rebuild_command_indexes_bulk_rows(self):
+        Product.objects.bulk_create([Product(title="Bulk teapot", price=Decimal("10"))])
+        self.assertEqual(self.search_ids("teapot")[0], [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(self.search_ids("teapot")[0]), 1)
+
+
+class ProductFilterFacetTests(APITestCase):
+    url = reverse("product-list")
+
+    def setUp(self):
+        self.cheap = make_product(title="Cheap", price="199.00", rating=4.5)
+        self.mid = make_product(title="Mid", price="999.00", rating=3.2)
+        self.pricey = make_product(title="Pricey", price="7999.00", rating=4.1)
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]], response.data
+
+    def test_price_and_rating_filters(self):
+        ids, _ = self.ids(min_price="500", min_rating="4")
+        self.assertEqual(ids, [self.pricey.id])
+
+    def test_sort_options(self):
+        self.assertEqual(
+            self.ids(sort="price_asc")[0], [self.cheap.id, self.mid.id, self.pricey.id]
+        )
+        self.assertEqual(
+            self.ids(sort="rating")[0], [self.cheap.id, self.pricey.id, self.mid.id]
+        )
+
+    def test_sorted_pages_follow_cursor(self):
+        ids, data = self.ids(sort="price_desc", page_size=2)
+        ids += [row["id"] for row in self.client.get(data["next"]).data["results"]]
+        self.assertEqual(ids, [self.pricey.id, self.mid.id, self.cheap.id])
+
+    def test_facet_counts_apply_other_facet_filters(self):
+        _, data = self.ids(min_rating="4")
+        price = {b["key"]: b["count"] for b in data["facets"]["price"]}
+        rating = {b["key"]: b["count"] for b in data["facets"]["rating"]}
+        self.assertEqual(price, {"lt_500": 1, "500_1999": 0, "2000_4999": 0, "gte_5000": 1})
+        self.assertEqual(rating, {"4_plus": 2, "3_4": 1, "below_3": 0})
+
+    def test_facets_cost_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        # page query + facet aggregate
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_invalid_params_are_400(self):
+        self.assertEqual(self.client.get(self.url, {"sort": "bogus"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.url, {"min_price": 10, "max_price": 5}).status_code, 400
+        )
+
+
+CATALOG_TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-tests",
+    },
+}
+
+
+@override_settings(CACHES=CATALOG_TEST_CACHES, CATALOG_CACHE_ALIAS="catalog")
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        catalog_cache.get_cache().clear()
+        self.product = make_product(title="Cached")
+
+    def test_anonymous_repeat_request_is_served_without_queries(self):
+        url = reverse("product-detail", args=[self.product.id])
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["title"], "Cached")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_product_save_invalidates(self):
+        url = reverse("product-list")
+        self.client.get(url)
+        self.product.title = "Renamed"
+        self.product.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["title"], "Renamed")
+
+    def test_errors_are_not_cached(self):
+        url = reverse("product-detail", args=[999999])
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("X-Cache", response)
+
+    def test_authenticated_requests_bypass_cache(self):
+        user = User.objects.create_user("cachebuster", password="pass12345")
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("product-list"))
+        self.assertNotIn("X-Cache", response)
+
+
+@override_settings(CACHES=CATALOG_TEST_CACHES, CATALOG_CACHE_ALIAS="catalog")
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_misses_build_once(self):
+        catalog_cache.get_cache().clear()
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {"ok": True}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(catalog_cache.get_or_build("k", build))
+            )
+            for _ in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, [{"ok": True}] * 20)
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.product = make_product(title="Desk", description="Long text " * 50)
+
+    def test_list_omits_description_by_default(self):
+        row = self.client.get(reverse("product-list")).data["results"][0]
+        self.assertNotIn("description", row)
+        self.assertEqual(row["title"], "Desk")
+
+    def test_fields_param_narrows_response_and_select(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("product-list"), {"fields": "title,price"})
+        row = response.data["results"][0]
+        self.assertEqual(set(row), {"id", "title", "price"})
+
+        page_sql = ctx.captured_queries[0]["sql"]
+        self.assertNotIn('"description"', page_sql)
+        self.assertNotIn('"image"', page_sql)
+
+    def test_detail_supports_fields(self):
+        url = reverse("product-detail", args=[self.product.id])
+        self.assertIn("description", self.client.get(url).data)
+        self.assertEqual(
+            set(self.client.get(url, {"fields": "description"}).data),
+            {"id", "description"},
+        )
+
+    def test_wishlist_products_support_fields(self):
+        user = User.objects.create_user("sparse", password="pass12345")
+        Wishlist.objects.create(user=user).products.add(self.product)
+        self.client.force_authenticate(user)
+
+        response = self.client.get(reverse("wishlist"), {"fields": "title"})
+        self.assertEqual(response.data["products"], [{"id": self.product.id, "title": "Desk"}])
+
+
+class ImportProductsCommandTests(APITestCase):
+    def write_file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_products", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_upsert_on_sku(self):
+        first = self.write_file(
+            ".csv",
+            "sku,title,price,rating\n"
+            "A-1,Kettle,499.00,4.2\n"
+            "A-2,Toaster,999.00,3.9\n",
+        )
+        self.run_import(first, "--chunk-size", "1")
+
+        second = self.write_file(".csv", "sku,title,price\nA-1,Steel kettle,549.00\n")
+        self.run_import(second)
+
+        self.assertEqual(Product.objects.count(), 2)
+        kettle = Product.objects.get(sku="A-1")
+        self.assertEqual(kettle.title, "Steel kettle")
+        self.assertEqual(kettle.price, Decimal("549.00"))
+        # rating column feed me nahi tha -> purani value bachi rehni chahiye
+        self.assertEqual(kettle.rating, 4.2)
+        self.assertEqual(search.search_product_ids("steel", 10)[0][0], kettle.id)
+
+    def test_jsonl_invalid_rows_are_skipped(self):
+        path = self.write_file(
+            ".jsonl",
+            '{"sku": "J-1", "title": "Mug", "price": "120.50"}\n'
+            '{"sku": "J-2", "title": "No price"}\n'
+            "not json\n"
+            '{"sku": "J-3", "title": "Bad rating", "price": "10", "rating": 9}\n',
+        )
+        out, err = self.run_import(path)
+
+        self.assertEqual(list(Product.objects.values_list("sku", flat=True)), ["J-1"])
+        self.assertIn("line 2", err)
+        self.assertIn("line 3", err)
+        self.assertIn("line 4", err)
+        self.assertIn("3 invalid rows skipped", out)
+
+
+class ProductExportTests(APITestCase):
+    url = reverse("product-export")
+
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", password="pass12345", is_staff=True)
+        self.old = make_product(title="Old", price="10.00")
+        self.new = make_product(title="New", price="20.00")
+        Product.objects.filter(pk=self.old.pk).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_requires_staff(self):
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+        self.client.force_authenticate(User.objects.create_user("shopper2", password="x" * 8))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_jsonl_stream_in_update_order(self):
+        self.client.force_authenticate(self.staff)
+        rows = [json.loads(line) for line in self.body(self.client.get(self.url)).splitlines()]
+        self.assertEqual([r["id"] for r in rows], [self.old.id, self.new.id])
+        self.assertEqual(rows[1]["price"], "20.00")
+
+    def test_csv_with_updated_since(self):
+        self.client.force_authenticate(self.staff)
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(self.url, {"fmt": "csv", "updated_since": since})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(StringIO(self.body(response))))
+        self.assertEqual([int(r["id"]) for r in rows], [self.new.id])
+
+    def test_after_id_makes_cursor_exclusive(self):
+        self.client.force_authenticate(self.staff)
+        self.new.refresh_from_db()
+        response = self.client.get(
+            self.url,
+            {"updated_since": self.new.updated_at.isoformat(), "after_id": self.new.id},
+        )
+        self.assertEqual(self.body(response), "")
+
+    def test_command_writes_jsonl(self):
+        out = StringIO()
+        call_command("export_products", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class ReviewAggregateTests(APITestCase):
+    def setUp(self):
+        self.product = make_product(title="Reviewed")
+        self.users = [
+            User.objects.create_user(f"reviewer{i}", password="pass12345") for i in range(3)
+        ]
+        self.url = reverse("product-reviews", args=[self.product.id])
+
+    def post_review(self, user, rating):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, {"rating": rating, "comment": "ok"})
+
+    def assertAggregates(self, rating, count):
+        self.product.refresh_from_db()
+        self.assertAlmostEqual(self.product.rating, rating)
+        self.assertEqual(self.product.num_reviews, count)
+
+    def test_running_average_on_create_update_delete(self):
+        for user, stars in zip(self.users, (5, 4, 3)):
+            self.assertEqual(self.post_review(user, stars).status_code, 201)
+        self.assertAggregates(4.0, 3)
+
+        review = Review.objects.get(user=self.users[2])
+        detail = reverse("product-review-detail", args=[self.product.id, review.id])
+        self.client.force_authenticate(self.users[2])
+        self.assertEqual(self.client.patch(detail, {"rating": 1}).status_code, 200)
+        self.assertAggregates(10 / 3, 3)
+
+        self.assertEqual(self.client.delete(detail).status_code, 204)
+        self.assertAggregates(4.5, 2)
+
+        Review.objects.all().delete()
+        self.assertAggregates(0.0, 0)
+
+    def test_review_write_does_not_scan_reviews(self):
+        self.post_review(self.users[0], 4)
+        with CaptureQueriesContext(connection) as ctx:
+            self.post_review(self.users[1], 2)
+        self.assertFalse(any("AVG(" in q["sql"].upper() for q in ctx.captured_queries))
+        self.assertAggregates(3.0, 2)
+
+    def test_product_delete_skips_per_review_updates(self):
+        def delete_with_reviews(count):
+            product = make_product(title=f"Gone {count}")
+            Review.objects.bulk_create(
+                [Review(product=product, user=user, rating=4) for user in self.users[:count]]
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                product.delete()
+            return ctx.captured_queries
+
+        one, three = delete_with_reviews(1), delete_with_reviews(3)
+        self.assertEqual(len(one), len(three))
+        self.assertFalse(any("UPDATE" in q["sql"] for q in three))
+
+    def test_user_delete_recomputes_once_per_product(self):
+        other = make_product(title="Other")
+        for user, stars in zip(self.users, (5, 3, 1)):
+            Review.objects.create(product=self.product, user=user, rating=stars)
+        Review.objects.create(product=other, user=self.users[0], rating=2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.users[0].delete()
+
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "products_product"')]
+        self.assertEqual(len(updates), 1)
+        self.assertAggregates(2.0, 2)
+        other.refresh_from_db()
+        self.assertEqual((other.rating, other.num_reviews), (0.0, 0))
+
+        # baad me normal review delete phir se per-row delta lagata hai
+        Review.objects.get(user=self.users[1]).delete()
+        self.assertAggregates(1.0, 1)
+
+    def test_failed_user_delete_leaves_no_skip_marker(self):
+        Review.objects.create(product=self.product, user=self.users[0], rating=5)
+        Review.objects.create(product=self.product, user=self.users[1], rating=1)
+
+        def fail(sender, **kwargs):
+            raise RuntimeError("delete aborted")
+
+        pre_delete.connect(fail, sender=User, dispatch_uid="test-fail-user-delete")
+        self.addCleanup(pre_delete.disconnect, sender=User, dispatch_uid="test-fail-user-delete")
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.users[0].delete()
+        pre_delete.disconnect(sender=User, dispatch_uid="test-fail-user-delete")
+
+        # user bacha hua hai; uska review ab normal delete hona chahiye
+        Review.objects.get(user=self.users[0]).delete()
+        self.assertAggregates(1.0, 1)
+
+    def test_one_review_per_user(self):
+        self.post_review(self.users[0], 4)
+        self.assertEqual(self.post_review(self.users[0], 5).status_code, 400)
+
+    def test_only_author_can_edit(self):
+        self.post_review(self.users[0], 4)
+        review = Review.objects.get()
+        self.client.force_authenticate(self.users[1])
+        detail = reverse("product-review-detail", args=[self.product.id, review.id])
+        self.assertEqual(self.client.patch(detail, {"rating": 1}).status_code, 404)
+
+    def test_list_is_public(self):
+        self.post_review(self.users[0], 4)
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url)
+        self.assertEqual([r["rating"] for r in response.data["results"]], [4])
+
+    def test_recompute_command_repairs_drift(self):
+        self.post_review(self.users[0], 5)
+        self.post_review(self.users[1], 2)
+        Product.objects.update(rating=0, num_reviews=99)
+
+        call_command("recompute_ratings", stdout=StringIO())
+        self.assertAggregates(3.5, 2)
+
+
+class ProductQueryPlanTests(QueryPlanAssertions, APITestCase):
+    def test_catalog_default_page(self):
+        self.assertUsesIndex(
+            Product.objects.order_by(*SORT_OPTIONS["newest"])[:21], "product_newest_idx"
+        )
+
+    def test_catalog_keyset_next_page(self):
+        queryset = Product.objects.filter(created_at__lte=timezone.now()).order_by(
+            *SORT_OPTIONS["newest"]
+        )
+        self.assertUsesIndex(queryset[:21], "product_newest_idx")
+
+    def test_price_filter_sorted_by_price(self):
+        queryset = Product.objects.filter(price__gte=500, price__lte=2000).order_by(
+            *SORT_OPTIONS["price_asc"]
+        )
+        self.assertUsesIndex(queryset[:21], "product_price_idx")
+
+    def test_rating_filter_sorted_by_rating(self):
+        queryset = Product.objects.filter(rating__gte=4).order_by(*SORT_OPTIONS["rating"])
+        self.assertUsesIndex(queryset[:21], "product_rating_idx")
+
+    def test_admin_bucket_filters(self):
+        price = PriceFilter(None, {"price_bucket": ["500_1999"]}, Product, None)
+        queryset = price.queryset(None, Product.objects.order_by("-created_at"))
+        self.assertUsesIndex(queryset[:25], "product_price_idx", allow_sort=True)
+
+        rating = RatingFilter(None, {"rating_bucket": ["4_plus"]}, Product, None)
+        queryset = rating.queryset(None, Product.objects.order_by("-rating", "-id"))
+        self.assertUsesIndex(queryset[:25], "product_rating_idx")
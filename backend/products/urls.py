@@ -1,8 +1,24 @@
 from django.urls import path
-from .views import ProductListAPIView, ProductDetailAPIView, WishlistView
+from .views import (
+    ProductListAPIView,
+    ProductSearchAPIView,
+    ProductDetailAPIView,
+    ProductExportView,
+    ReviewDetailView,
+    ReviewListCreateView,
+    WishlistView,
+)
 
 urlpatterns = [
     path("", ProductListAPIView.as_view(), name="product-list"),
+    path("search/", ProductSearchAPIView.as_view(), name="product-search"),
+    path("export/", ProductExportView.as_view(), name="product-export"),
     path("<int:id>/", ProductDetailAPIView.as_view(), name="product-detail"),
+    path("<int:id>/reviews/", ReviewListCreateView.as_view(), name="product-reviews"),
+    path(
+        "<int:id>/reviews/<int:pk>/",
+        ReviewDetailView.as_view(),
+        name="product-review-detail",
+    ),
     path("wishlist/", WishlistView.as_view(), name="wishlist"),
 ]
@@ -1,13 +1,75 @@
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from .models import Product, Wishlist
-from .serializers import ProductSerializer, WishlistSerializer
+from rest_framework.views import APIView
 
+from ecommerce.exports import CONTENT_TYPES, streaming_response
+from ecommerce.pagination import KeysetCursorPagination, RankedCursorPagination
+from .cache import CatalogCacheMixin
+from .exports import export_queryset, iter_export
+from .filters import ProductFilterSerializer, facet_counts
+from .models import Product, Review, Wishlist
+from .serializers import (
+    ProductListSerializer,
+    ProductSerializer,
+    ReviewSerializer,
+    WishlistSerializer,
+    product_columns,
+)
+from . import search
 
-class ProductListAPIView(generics.ListAPIView):
-    queryset = Product.objects.all().order_by("-created_at")
-    serializer_class = ProductSerializer
+
+class ProductListAPIView(CatalogCacheMixin, generics.ListAPIView):
+    """
+    GET /api/products/?cursor=...&page_size=20
+        &min_price=500&max_price=2000&min_rating=4&sort=price_asc
+
+    Keyset-paginated on the active sort key + id, so deep pages cost the same
+    as the first one. The first page (no cursor) also carries "facets": price
+    and rating bucket counts from a single aggregate query. Anonymous
+    responses are served from the catalog cache (see products/cache.py).
+
+    Rows use the slim list serializer (no description); ?fields=id,title,price
+    narrows them further and only those columns are SELECTed.
+    """
+    queryset = Product.objects.all()
+    serializer_class = ProductListSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetCursorPagination
+
+    def get_filters(self):
+        if not hasattr(self, "_filters"):
+            self._filters = ProductFilterSerializer(data=self.request.query_params)
+            self._filters.is_valid(raise_exception=True)
+        return self._filters
+
+    def get_queryset(self):
+        filters = self.get_filters()
+        ordering = filters.get_ordering()
+        columns = product_columns(
+            self.get_serializer_class(),
+            self.request,
+            extra=[key.lstrip("-") for key in ordering],
+        )
+        return (
+            super()
+            .get_queryset()
+            .filter(filters.price_q() & filters.rating_q())
+            .order_by(*ordering)
+            .only(*columns)
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if "cursor" not in request.query_params:
+            filters = self.get_filters()
+            response.data["facets"] = facet_counts(
+                Product.objects.all(), filters.price_q(), filters.rating_q()
+            )
+        return response
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -15,23 +77,158 @@ class ProductListAPIView(generics.ListAPIView):
         return context
 
 
-class ProductDetailAPIView(generics.RetrieveAPIView):
+class ProductSearchAPIView(generics.GenericAPIView):
+    """
+    GET /api/products/search/?q=wireless+mouse&page_size=20&cursor=...
+
+    BM25-ranked results from the FTS5 index; pages are keyset on
+    (score, id) so the next link never re-scans earlier matches.
+    Supports ?fields= like the product list.
+    """
+    serializer_class = ProductListSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = RankedCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"detail": "q is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = self.paginator.paginate_rows(
+            request,
+            fetch=lambda after, limit: search.search_product_ids(query, limit, after=after),
+            key=lambda row: [row[0], row[1]],
+            parse=lambda values: (int(values[0]), float(values[1])),
+        )
+
+        products = Product.objects.only(
+            *product_columns(self.get_serializer_class(), request)
+        ).in_bulk([product_id for product_id, _ in rows])
+        results = [products[product_id] for product_id, _ in rows if product_id in products]
+
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ProductDetailAPIView(CatalogCacheMixin, generics.RetrieveAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = "id"
 
+    def get_queryset(self):
+        return super().get_queryset().only(
+            *product_columns(self.get_serializer_class(), self.request)
+        )
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["request"] = self.request
         return context
 
 
+class ReviewListCreateView(generics.ListCreateAPIView):
+    """
+    GET  /api/products/<id>/reviews/   -> newest first, cursor paginated
+    POST /api/products/<id>/reviews/   {"rating": 4, "comment": "..."}
+    """
+
+    serializer_class = ReviewSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetCursorPagination
+
+    def get_product(self):
+        if not hasattr(self, "_product"):
+            try:
+                self._product = Product.objects.only("id").get(id=self.kwargs["id"])
+            except Product.DoesNotExist:
+                raise NotFound("Product not found")
+        return self._product
+
+    def get_queryset(self):
+        return (
+            Review.objects.filter(product=self.get_product())
+            .select_related("user")
+            .order_by("-created_at", "-id")
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["product"] = self.get_product()
+        return context
+
+    def perform_create(self, serializer):
+        serializer.save(product=self.get_product(), user=self.request.user)
+
+
+class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    GET / PATCH / DELETE /api/products/<id>/reviews/<pk>/  (sirf apna review)
+    """
+
+    serializer_class = ReviewSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Review.objects.filter(
+            product_id=self.kwargs["id"], user=self.request.user
+        ).select_related("user")
+
+
+class ProductExportView(APIView):
+    """
+    GET /api/products/export/?fmt=jsonl|csv&updated_since=<iso>&after_id=<id>
+
+    Staff-only streaming dump of the catalog, oldest change first. For
+    incremental pulls pass the updated_at / id of the last row received.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        fmt = request.query_params.get("fmt", "jsonl")
+        if fmt not in CONTENT_TYPES:
+            return Response(
+                {"detail": "fmt must be one of: " + ", ".join(CONTENT_TYPES)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        updated_since = None
+        raw_since = request.query_params.get("updated_since")
+        if raw_since:
+            updated_since = parse_datetime(raw_since)
+            if updated_since is None:
+                return Response(
+                    {"detail": "updated_since must be an ISO 8601 datetime"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        after_id = request.query_params.get("after_id")
+        if after_id is not None:
+            try:
+                after_id = int(after_id)
+            except ValueError:
+                return Response(
+                    {"detail": "after_id must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        queryset = export_queryset(updated_since, after_id)
+        return streaming_response(iter_export(fmt, queryset), fmt, "products")
+
+
 class WishlistView(generics.GenericAPIView):
     """
     GET    /api/products/wishlist/            -> current user's wishlist
     POST   {"product_id": id}                -> add product
     DELETE {"product_id": id}                -> remove product
+
+    ?fields=id,title,price narrows the nested product rows.
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = WishlistSerializer
@@ -40,6 +237,19 @@ class WishlistView(generics.GenericAPIView):
         wishlist, _ = Wishlist.objects.get_or_create(user=self.request.user)
         return wishlist
 
+    def get_serializer(self, wishlist, *args, **kwargs):
+        # products ek hi query me, sirf zaroori columns ke saath
+        prefetch_related_objects(
+            [wishlist],
+            Prefetch(
+                "products",
+                queryset=Product.objects.only(
+                    *product_columns(ProductSerializer, self.request)
+                ),
+            ),
+        )
+        return super().get_serializer(wishlist, *args, **kwargs)
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["request"] = self.request
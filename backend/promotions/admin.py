@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Promotion
+
+
+@admin.register(Promotion)
+class PromotionAdmin(admin.ModelAdmin):
+    list_display = (
+        "name", "kind", "percent_off", "buy_quantity", "get_quantity",
+        "min_subtotal", "coupon_code", "is_active", "starts_at", "ends_at",
+    )
+    list_filter = ("kind", "is_active")
+    search_fields = ("name", "coupon_code")
+    raw_id_fields = ("products",)  # bade catalog me multi-select bhari padta hai
@@ -0,0 +1,257 @@
+"""
+Promotion engine: active Promotion rows compiled once into an in-memory
+RuleSet, then every cart is priced with a single pass over its lines.
+
+Compilation (two queries) happens per process. The compiled RuleSet is
+reused until the version counter in PROMOTIONS_CACHE_ALIAS changes (any
+Promotion save / delete / products change bumps it, see models.py) or it is
+older than PROMOTIONS_RULES_TTL. The version only reaches other processes
+when that alias is a shared cache; with the default per-process locmem only
+the process that saved recompiles at once and the others catch up within
+the TTL. Checking is one cache get.
+
+Per line the best discount among the rules that match it wins (no stacking):
+
+- percent: line total * percent_off
+- bxgy: every (buy + get) units of the product, `get` of them are free
+
+Rules are indexed by product, so a line only looks at its own product's
+rules plus the catalog-wide ones, not at every promotion. Unconditional
+catalog-wide percent rules are collapsed at compile time into a single
+"best percent at this subtotal" tier table.
+"""
+import bisect
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from ecommerce import versioning
+from .models import Promotion, normalize_coupon
+
+VERSION_KEY = "promotions:version"
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+HUNDRED = Decimal("100")
+
+
+def get_cache():
+    return caches[getattr(settings, "PROMOTIONS_CACHE_ALIAS", "default")]
+
+
+def get_rules_ttl():
+    return getattr(settings, "PROMOTIONS_RULES_TTL", 60)
+
+
+def get_version():
+    return versioning.get_version(get_cache(), VERSION_KEY)
+
+
+def invalidate_rules():
+    versioning.invalidate(get_cache(), VERSION_KEY)
+
+
+class Rule:
+    __slots__ = (
+        "id", "name", "kind", "rate", "buy", "get",
+        "min_subtotal", "code", "starts_at", "ends_at",
+    )
+
+    def __init__(self, promotion):
+        self.id = promotion["id"]
+        self.name = promotion["name"]
+        self.kind = promotion["kind"]
+        self.rate = (promotion["percent_off"] or ZERO) / HUNDRED
+        self.buy = promotion["buy_quantity"] or 0
+        self.get = promotion["get_quantity"] or 0
+        self.min_subtotal = promotion["min_subtotal"]
+        self.code = normalize_coupon(promotion["coupon_code"])  # bulk_create / update() bhi
+        self.starts_at = promotion["starts_at"]
+        self.ends_at = promotion["ends_at"]
+
+    def is_static_percent(self):
+        return (
+            self.kind == "percent"
+            and self.code is None
+            and self.starts_at is None
+            and self.ends_at is None
+        )
+
+    def live(self, now, coupon):
+        if self.code is not None and self.code != coupon:
+            return False
+        if self.starts_at is not None and now < self.starts_at:
+            return False
+        return self.ends_at is None or now < self.ends_at
+
+    def discount(self, quantity, price, line_total):
+        if self.kind == "percent":
+            return line_total * self.rate
+        group = self.buy + self.get
+        if not group:
+            return ZERO
+        return (quantity // group) * self.get * price
+
+
+class Pricing:
+    __slots__ = (
+        "subtotal", "discount", "total", "applied", "coupon", "coupon_valid", "coupon_applied",
+    )
+
+    def as_dict(self):
+        data = {
+            "discount": float(self.discount),
+            "total_payable": float(self.total),
+            "promotions": [
+                {"id": rule_id, "name": name, "amount": float(amount)}
+                for rule_id, (name, amount) in self.applied.items()
+            ],
+        }
+        if self.coupon:
+            data["coupon"] = {"code": self.coupon, "applied": self.coupon_applied}
+        return data
+
+
+class RuleSet:
+    def __init__(self, rules, scopes, version=None):
+        """
+        rules: Rule objects; scopes: {rule_id: [product_id, ...]} (missing or
+        empty = catalog-wide).
+        """
+        self.version = version
+        self.compiled_at = time.monotonic()
+        self.coupons = {}
+        for rule in rules:
+            if rule.code:
+                self.coupons.setdefault(rule.code, []).append(rule)
+        self.by_product = {}
+        self.catalog_rules = []
+        tiers = []
+        for rule in rules:
+            products = scopes.get(rule.id)
+            if products:
+                for product_id in products:
+                    self.by_product.setdefault(product_id, []).append(rule)
+            elif rule.is_static_percent():
+                tiers.append((rule.min_subtotal or ZERO, rule.rate, rule))
+            else:
+                self.catalog_rules.append(rule)
+
+        # tier table: threshold ascending, har threshold pe ab tak ka best rate
+        tiers.sort(key=lambda tier: tier[0])
+        self.tier_thresholds, self.tier_best = [], []
+        best = None
+        for threshold, rate, rule in tiers:
+            if best is None or rate > best[0]:
+                best = (rate, rule)
+            self.tier_thresholds.append(threshold)
+            self.tier_best.append(best)
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() - self.compiled_at < get_rules_ttl()
+
+    def catalog_percent(self, subtotal):
+        index = bisect.bisect_right(self.tier_thresholds, subtotal)
+        return self.tier_best[index - 1] if index else (ZERO, None)
+
+    def evaluate(self, lines, coupon=None, now=None):
+        """
+        lines: iterable of (product_id, quantity, unit_price). One pass over
+        the lines; the per-line winner is settled once the subtotal is known
+        (thresholds).
+        """
+        now = now or timezone.now()
+        coupon = normalize_coupon(coupon)
+        subtotal = ZERO
+        # per line: (line_total, [(min_subtotal, amount, rule), ...])
+        priced = []
+        catalog_rules = self.catalog_rules
+        by_product = self.by_product
+        for product_id, quantity, price in lines:
+            line_total = price * quantity
+            subtotal += line_total
+            candidates = []
+            for rules in (by_product.get(product_id, ()), catalog_rules):
+                for rule in rules:
+                    if rule.live(now, coupon):
+                        amount = rule.discount(quantity, price, line_total)
+                        if amount > 0:
+                            candidates.append((rule.min_subtotal, amount, rule))
+            priced.append((line_total, candidates))
+
+        rate, tier_rule = self.catalog_percent(subtotal)
+        discount = ZERO
+        applied = {}
+        coupon_applied = False
+        for line_total, candidates in priced:
+            best_amount, best_rule = line_total * rate, tier_rule
+            for min_subtotal, amount, rule in candidates:
+                if amount > best_amount and (min_subtotal is None or subtotal >= min_subtotal):
+                    best_amount, best_rule = amount, rule
+            if best_rule is None or not best_amount:
+                continue
+            best_amount = min(best_amount, line_total).quantize(CENT, ROUND_HALF_UP)
+            discount += best_amount
+            name, total = applied.get(best_rule.id, (best_rule.name, ZERO))
+            applied[best_rule.id] = (name, total + best_amount)
+            coupon_applied = coupon_applied or (coupon is not None and best_rule.code == coupon)
+
+        pricing = Pricing()
+        pricing.subtotal = subtotal
+        pricing.discount = discount
+        pricing.total = subtotal - discount
+        pricing.applied = applied
+        pricing.coupon = coupon
+        # valid = abhi live hai; applied = kisi line pe jeeta bhi
+        pricing.coupon_valid = any(rule.live(now, coupon) for rule in self.coupons.get(coupon, ()))
+        pricing.coupon_applied = coupon_applied
+        return pricing
+
+
+def compile_rules(version=None, now=None):
+    """
+    Active, not yet ended promotions -> RuleSet. Two queries.
+    """
+    now = now or timezone.now()
+    promotions = list(
+        Promotion.objects.filter(is_active=True)
+        .exclude(ends_at__lte=now)
+        .values(
+            "id", "name", "kind", "percent_off", "buy_quantity", "get_quantity",
+            "min_subtotal", "coupon_code", "starts_at", "ends_at",
+        )
+    )
+    scopes = {}
+    through = Promotion.products.through.objects.filter(
+        promotion_id__in=[promotion["id"] for promotion in promotions]
+    )
+    for promotion_id, product_id in through.values_list("promotion_id", "product_id"):
+        scopes.setdefault(promotion_id, []).append(product_id)
+    return RuleSet([Rule(promotion) for promotion in promotions], scopes, version)
+
+
+_compiled = None
+_compile_lock = threading.Lock()
+
+
+def get_rule_set():
+    """
+    Process-wide compiled RuleSet, recompiled when the version changes or
+    the TTL runs out.
+    """
+    global _compiled
+    version = get_version()
+    rule_set = _compiled
+    if rule_set is not None and rule_set.is_current(version):
+        return rule_set
+    with _compile_lock:
+        if _compiled is None or not _compiled.is_current(version):
+            _compiled = compile_rules(version)
+        return _compiled
+
+
+def price_lines(lines, coupon=None):
+    return get_rule_set().evaluate(lines, coupon)
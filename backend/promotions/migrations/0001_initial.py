@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:10
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Promotion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('percent', 'Percentage off'), ('bxgy', 'Buy X get Y free')], default='percent', max_length=20)),
+                ('percent_off', models.DecimalField(blank=True, decimal_places=2, help_text='Percentage off the line total (percent rules)', max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.01')), django.core.validators.MaxValueValidator(Decimal('100'))])),
+                ('buy_quantity', models.PositiveIntegerField(blank=True, help_text='Units to buy (buy X get Y rules)', null=True)),
+                ('get_quantity', models.PositiveIntegerField(blank=True, help_text='Units free per group (buy X get Y rules)', null=True)),
+                ('min_subtotal', models.DecimalField(blank=True, decimal_places=2, help_text='Only applies when the cart subtotal is at least this much', max_digits=10, null=True)),
+                ('coupon_code', models.CharField(blank=True, help_text='If set, applies only when the shopper enters this code', max_length=40, null=True, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('starts_at', models.DateTimeField(blank=True, null=True)),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('products', models.ManyToManyField(blank=True, help_text='Products this applies to; leave empty for the whole catalog', related_name='promotions', to='products.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from products.models import Product
+
+
+def normalize_coupon(code):
+    """
+    Coupon codes are stored and matched stripped and uppercase; blank = none.
+    """
+    code = (code or "").strip().upper()
+    return code or None
+
+
+class Promotion(models.Model):
+    """
+    Ek discount rule. Kisi cart line pe jo bhi rules lagte hain unme se sabse
+    bada discount milta hai (stacking nahi). Evaluation promotions/engine.py me.
+    """
+
+    KIND_CHOICES = [
+        ("percent", "Percentage off"),
+        ("bxgy", "Buy X get Y free"),
+    ]
+
+    name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default="percent")
+    percent_off = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(Decimal("0.01")), MaxValueValidator(Decimal("100"))],
+        help_text="Percentage off the line total (percent rules)",
+    )
+    buy_quantity = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Units to buy (buy X get Y rules)"
+    )
+    get_quantity = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Units free per group (buy X get Y rules)"
+    )
+    products = models.ManyToManyField(
+        Product,
+        blank=True,
+        related_name="promotions",
+        help_text="Products this applies to; leave empty for the whole catalog",
+    )
+    min_subtotal = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Only applies when the cart subtotal is at least this much",
+    )
+    coupon_code = models.CharField(
+        max_length=40,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="If set, applies only when the shopper enters this code",
+    )
+    is_active = models.BooleanField(default=True)
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        if self.kind == "percent" and not self.percent_off:
+            raise ValidationError({"percent_off": "Percent rules need percent_off."})
+        if self.kind == "bxgy" and not (self.buy_quantity and self.get_quantity):
+            raise ValidationError("Buy X get Y rules need buy_quantity and get_quantity.")
+        if self.starts_at and self.ends_at and self.starts_at >= self.ends_at:
+            raise ValidationError({"ends_at": "Must be after starts_at."})
+        self.coupon_code = normalize_coupon(self.coupon_code)
+
+    def save(self, *args, **kwargs):
+        # create() / fixtures / code se save bhi clean() nahi chalate
+        self.coupon_code = normalize_coupon(self.coupon_code)
+        super().save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+@receiver(m2m_changed, sender=Promotion.products.through)
+def invalidate_promotions_on_change(sender, **kwargs):
+    from .engine import invalidate_rules
+
+    invalidate_rules()
@@ -0,0 +1,216 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from addresses.models import Address
+from cart.models import Cart, CartItem
+from orders.models import Order
+from products.models import Product
+from .engine import Rule, compile_rules, get_rule_set
+from .models import Promotion
+
+User = get_user_model()
+
+
+class PromotionTestMixin:
+    def setUp(self):
+        cache.clear()
+        self.mug, self.plate = [
+            Product.objects.create(title=title, price=Decimal(price))
+            for title, price in (("Mug", "100.00"), ("Plate", "40.00"))
+        ]
+
+    def promo(self, products=(), **fields):
+        fields.setdefault("name", "Promo")
+        promotion = Promotion.objects.create(**fields)
+        promotion.products.set(products)
+        return promotion
+
+
+class RuleSetTests(PromotionTestMixin, TestCase):
+    def evaluate(self, lines, coupon=None):
+        return compile_rules().evaluate(lines, coupon)
+
+    def test_percent_and_bxgy_best_per_line(self):
+        self.promo([self.mug], kind="percent", percent_off=10)
+        self.promo([self.mug], kind="bxgy", buy_quantity=2, get_quantity=1)
+        self.promo(kind="percent", percent_off=5)  # poora catalog
+
+        pricing = self.evaluate(
+            [(self.mug.id, 3, Decimal("100.00")), (self.plate.id, 1, Decimal("40.00"))]
+        )
+
+        # mug: 3 me 1 free (100) > 10% (30); plate: catalog 5% (2)
+        self.assertEqual(pricing.subtotal, Decimal("340.00"))
+        self.assertEqual(pricing.discount, Decimal("102.00"))
+        self.assertEqual(pricing.total, Decimal("238.00"))
+        self.assertEqual(len(pricing.applied), 2)
+
+    def test_subtotal_threshold(self):
+        self.promo(kind="percent", percent_off=20, min_subtotal=500)
+        self.promo(kind="percent", percent_off=10, min_subtotal=200)
+
+        self.assertEqual(self.evaluate([(self.mug.id, 1, Decimal("100"))]).discount, 0)
+        self.assertEqual(self.evaluate([(self.mug.id, 3, Decimal("100"))]).discount, 30)
+        self.assertEqual(self.evaluate([(self.mug.id, 5, Decimal("100"))]).discount, 100)
+
+    def test_coupon_and_time_window(self):
+        self.promo(kind="percent", percent_off=25, coupon_code="SAVE25")
+        self.promo(kind="percent", percent_off=50, starts_at=timezone.now() + timedelta(days=1))
+        lines = [(self.plate.id, 1, Decimal("40.00"))]
+
+        self.assertEqual(self.evaluate(lines).discount, 0)
+        pricing = self.evaluate(lines, coupon="save25")
+        self.assertEqual(pricing.discount, Decimal("10.00"))
+        self.assertTrue(pricing.coupon_applied)
+        self.assertFalse(self.evaluate(lines, coupon="NOPE").coupon_applied)
+
+    def test_coupon_code_is_normalised_outside_forms(self):
+        promotion = self.promo(kind="percent", percent_off=10, coupon_code=" save10 ")
+        promotion.refresh_from_db()
+        self.assertEqual(promotion.coupon_code, "SAVE10")
+        self.assertIsNone(self.promo(kind="percent", percent_off=5, coupon_code="  ").coupon_code)
+
+        lines = [(self.plate.id, 1, Decimal("40.00"))]
+        self.assertTrue(self.evaluate(lines, coupon="Save10").coupon_applied)
+
+        # save() ke bina likha gaya lowercase code bhi match ho
+        Promotion.objects.filter(pk=promotion.pk).update(coupon_code="save10")
+        self.assertTrue(self.evaluate(lines, coupon="SAVE10").coupon_applied)
+
+    def test_rule_set_is_recompiled_only_on_change(self):
+        self.promo(kind="percent", percent_off=10)
+        get_rule_set()
+        with CaptureQueriesContext(connection) as ctx:
+            rule_set = get_rule_set()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        Promotion.objects.update(is_active=False)  # queryset update signal nahi bhejta
+        self.assertIs(get_rule_set(), rule_set)
+        Promotion.objects.get().save()
+        self.assertIsNot(get_rule_set(), rule_set)
+        self.assertEqual(get_rule_set().evaluate([(self.mug.id, 1, Decimal("100"))]).discount, 0)
+
+    @override_settings(PROMOTIONS_RULES_TTL=0)
+    def test_rule_set_expires_without_version_bump(self):
+        # dusre worker ka save: is process ka version nahi badla
+        self.promo(kind="percent", percent_off=10)
+        rule_set = get_rule_set()
+        Promotion.objects.update(is_active=False)
+        self.assertIsNot(get_rule_set(), rule_set)
+        self.assertEqual(get_rule_set().evaluate([(self.mug.id, 1, Decimal("100"))]).discount, 0)
+
+    def test_hundreds_of_promotions_only_check_own_rules(self):
+        products = Product.objects.bulk_create(
+            [Product(title=f"P{i}", price=Decimal("10.00")) for i in range(300)]
+        )
+        promotions = Promotion.objects.bulk_create(
+            [
+                Promotion(
+                    name=f"P{i}", kind="percent", percent_off=1 + i % 30, min_subtotal=i % 7 * 100
+                )
+                if i % 3
+                else Promotion(name=f"P{i}", kind="bxgy", buy_quantity=2, get_quantity=1)
+                for i in range(300)
+            ]
+        )
+        through = Promotion.products.through
+        through.objects.bulk_create(
+            [
+                through(promotion=promotion, product=products[(i * 7 + k) % 300])
+                for i, promotion in enumerate(promotions[:280])
+                for k in range(3)
+            ]
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            rule_set = compile_rules()
+        self.assertEqual(len(ctx.captured_queries), 2)
+        # 20 catalog-wide: unconditional percents tier table me, sirf bxgy bache
+        self.assertEqual(len(rule_set.tier_thresholds) + len(rule_set.catalog_rules), 20)
+        self.assertTrue(all(rule.kind == "bxgy" for rule in rule_set.catalog_rules))
+
+        lines = [(p.id, 1 + i % 4, p.price) for i, p in enumerate(products[:40])]
+        live = Rule.live
+        with mock.patch.object(Rule, "live", autospec=True, side_effect=live) as checked:
+            with CaptureQueriesContext(connection) as ctx:
+                rule_set.evaluate(lines)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        # har line apne product ke rules + catalog bxgy dekhti hai, 300 nahi
+        self.assertEqual(
+            checked.call_count,
+            sum(
+                len(rule_set.by_product.get(product_id, ())) + len(rule_set.catalog_rules)
+                for product_id, _, _ in lines
+            ),
+        )
+
+
+class CartPromotionTests(PromotionTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("buyer", password="pass12345")
+        self.client.force_authenticate(self.user)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.mug, quantity=2)
+        self.address = Address.objects.create(
+            user=self.user, full_name="Buyer", phone="9999999999", line1="Street 1",
+            city="Jaipur", state="RJ", pincode="302001",
+        )
+        self.promo([self.mug], name="Mug sale", kind="percent", percent_off=10)
+        self.promo(name="Coupon", kind="percent", percent_off=30, coupon_code="BIG30")
+
+    def test_cart_shows_discount(self):
+        data = self.client.get(reverse("cart")).data
+        self.assertEqual(data["total_price"], 200.0)
+        self.assertEqual(data["discount"], 20.0)
+        self.assertEqual(data["total_payable"], 180.0)
+        self.assertEqual([p["name"] for p in data["promotions"]], ["Mug sale"])
+
+        data = self.client.get(reverse("cart"), {"coupon": "big30"}).data
+        self.assertEqual(data["discount"], 60.0)
+        self.assertEqual(data["coupon"], {"code": "BIG30", "applied": True})
+
+    def test_checkout_locks_in_discount(self):
+        response = self.client.post(
+            reverse("cart-checkout"), {"address_id": self.address.id, "coupon_code": "BIG30"}
+        )
+        self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.discount_amount, Decimal("60.00"))
+        self.assertEqual(order.total_amount, Decimal("140.00"))
+        self.assertEqual(order.coupon_code, "BIG30")
+
+        # baad me promotion badle to bhi order ka total wahi rahe
+        Promotion.objects.all().delete()
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal("140.00"))
+
+    def test_checkout_with_outbid_coupon_is_not_applied(self):
+        # mug pe 60% sale coupon ke 30% se behtar - coupon valid hai par kisi line pe nahi jeeta
+        self.promo([self.mug], name="Mega sale", kind="percent", percent_off=60)
+        response = self.client.post(
+            reverse("cart-checkout"), {"address_id": self.address.id, "coupon_code": "big30"}
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["coupon"], {"code": "BIG30", "applied": False})
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.discount_amount, Decimal("120.00"))
+        self.assertEqual(order.coupon_code, "")
+
+    def test_checkout_rejects_unknown_coupon(self):
+        response = self.client.post(
+            reverse("cart-checkout"), {"address_id": self.address.id, "coupon_code": "NOPE"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
@@ -2,6 +2,11 @@ from django.contrib.auth.models import User
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from cart.guest import HEADER as CART_TOKEN_HEADER
+from cart.store import merge_guest_cart
 
 from .serializers import (
     UserRegisterSerializer,
@@ -39,3 +44,25 @@ class ChangePasswordView(APIView):
                 status=status.HTTP_200_OK,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class LoginView(TokenObtainPairView):
+    """
+    POST /api/token/  {"username", "password"[, "cart_token"]}
+
+    Normal JWT pair. Guest cart ka token (body "cart_token" ya X-Cart-Token
+    header) aaye to guest cart user ke cart me merge ho jata hai.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        data = dict(serializer.validated_data)
+        cart_token = request.data.get("cart_token") or request.headers.get(CART_TOKEN_HEADER)
+        if cart_token:
+            data["merged_cart_items"] = merge_guest_cart(serializer.user, cart_token)
+        return Response(data, status=status.HTTP_200_OK)
@@ -24,7 +24,9 @@ const Orders = () => {
   const navigate = useNavigate();
   const [orders, setOrders] = useState(null);
   const [filtered, setFiltered] = useState(null);
+  const [nextUrl, setNextUrl] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
 
   const [statusFilter, setStatusFilter] = useState("all");
@@ -42,8 +44,10 @@ const Orders = () => {
       }
 
       try {
+        // cursor-paginated: { results, next }
         const res = await API.get("/orders/");
-        setOrders(res.data);
+        setOrders(res.data.results || []);
+        setNextUrl(res.data.next || null);
         setError(null);
       } catch (err) {
         console.error(
@@ -52,6 +56,7 @@ const Orders = () => {
         );
         setError(err.response?.data?.detail || "Failed to load orders");
         setOrders(null);
+        setNextUrl(null);
       } finally {
         setLoading(false);
       }
@@ -60,6 +65,37 @@ const Orders = () => {
     fetchOrders();
   }, [access]);
 
+  const loadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      // next link server ka cursor URL hai
+      const res = await API.get(nextUrl);
+      setOrders((prev) => [...(prev || []), ...(res.data.results || [])]);
+      setNextUrl(res.data.next || null);
+    } catch (err) {
+      console.error(
+        "❌ Error fetching orders:",
+        err.response?.data || err.message
+      );
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // filters sirf loaded orders pe chalte hain - baaki pages ke liye button
+  const loadMoreButton = nextUrl && (
+    <div className="orders-more">
+      <button
+        className="orders-more-btn"
+        onClick={loadMore}
+        disabled={loadingMore}
+      >
+        {loadingMore ? "Loading..." : "Load older orders"}
+      </button>
+    </div>
+  );
+
   // apply filters + search when orders / filters change
   useEffect(() => {
     if (!orders) {
@@ -189,6 +225,7 @@ const Orders = () => {
                 : "You haven't placed any orders. Start shopping now!"}
             </p>
           </div>
+          {loadMoreButton}
         </div>
       </div>
     );
@@ -332,6 +369,7 @@ const Orders = () => {
             </div>
           ))}
         </div>
+        {loadMoreButton}
       </div>
     </div>
   );
@@ -4,34 +4,77 @@ import API from "../api";
 import ProductCard from "../components/ProductCard";
 import "./ProductsPage.css";
 
+const SORT_OPTIONS = [
+  { value: "newest", label: "Newest" },
+  { value: "price_asc", label: "Price: low to high" },
+  { value: "price_desc", label: "Price: high to low" },
+  { value: "rating", label: "Top rated" },
+];
+
+// server filters jo URL se seedha API ko jaate hain
+const FILTER_PARAMS = ["sort", "min_price", "max_price", "min_rating"];
+
 const ProductsPage = () => {
   const [products, setProducts] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [loading, setLoading] = useState(true);
-  const [searchParams] = useSearchParams();
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [searchParams, setSearchParams] = useSearchParams();
 
   const rawQuery = searchParams.get("q") || "";
-  const query = rawQuery.toLowerCase().trim();
+  const query = rawQuery.trim();
+  const sort = searchParams.get("sort") || "newest";
+  const paramsKey = searchParams.toString();
 
   useEffect(() => {
     const fetchProducts = async () => {
+      setLoading(true);
       try {
-        const res = await API.get("/products/");
-        setProducts(res.data);
+        // search: FTS endpoint (poora catalog), warna filtered + paginated list
+        const res = query
+          ? await API.get("/products/search/", { params: { q: query } })
+          : await API.get("/products/", {
+              params: Object.fromEntries(
+                FILTER_PARAMS.filter((name) => searchParams.get(name)).map(
+                  (name) => [name, searchParams.get(name)]
+                )
+              ),
+            });
+        setProducts(res.data.results || []);
+        setNextUrl(res.data.next || null);
       } catch (err) {
         console.error("Products load error:", err);
+        setProducts([]);
+        setNextUrl(null);
       } finally {
         setLoading(false);
       }
     };
 
     fetchProducts();
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [paramsKey]);
 
-  const filtered = query
-    ? products.filter((p) =>
-        (p.title || "").toLowerCase().includes(query)
-      )
-    : products;
+  const loadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      // next link server ka cursor URL hai
+      const res = await API.get(nextUrl);
+      setProducts((prev) => [...prev, ...(res.data.results || [])]);
+      setNextUrl(res.data.next || null);
+    } catch (err) {
+      console.error("Products load error:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const changeSort = (e) => {
+    const params = new URLSearchParams(searchParams);
+    params.set("sort", e.target.value);
+    setSearchParams(params);
+  };
 
   if (loading) {
     return (
@@ -42,18 +85,27 @@ const ProductsPage = () => {
   }
 
   const hasQuery = query.length > 0;
-  const resultsCount = filtered.length;
 
   return (
     <div className="products-wrapper">
-      <h2 className="products-heading">All products</h2>
+      <div className="products-toolbar">
+        <h2 className="products-heading">All products</h2>
+        {!hasQuery && (
+          <select className="products-sort" value={sort} onChange={changeSort}>
+            {SORT_OPTIONS.map((option) => (
+              <option key={option.value} value={option.value}>
+                {option.label}
+              </option>
+            ))}
+          </select>
+        )}
+      </div>
 
       {hasQuery && (
         <div className="products-search-info">
-          {resultsCount > 0 ? (
+          {products.length > 0 ? (
             <p>
-              Showing <strong>{resultsCount}</strong> result
-              {resultsCount > 1 ? "s" : ""} for “{rawQuery}”.
+              Showing results for “<strong>{rawQuery}</strong>”.
             </p>
           ) : (
             <p>
@@ -65,14 +117,26 @@ const ProductsPage = () => {
       )}
 
       <div className="products-grid">
-        {filtered.map((product) => (
+        {products.map((product) => (
           <ProductCard key={product.id} product={product} />
         ))}
 
-        {!hasQuery && filtered.length === 0 && (
+        {!hasQuery && products.length === 0 && (
           <p className="muted-text">There are no products available yet.</p>
         )}
       </div>
+
+      {nextUrl && (
+        <div className="products-more">
+          <button
+            className="products-more-btn"
+            onClick={loadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 };